@@ -1,41 +1,191 @@
-from flask import Flask, render_template, request, jsonify, url_for
+from flask import Flask, render_template, request, jsonify, url_for, g, Response, stream_with_context
 import os
-import pandas as pd
-from models.menu_processing import process_menu_text, process_menu
+import json
+import uuid
+import threading
+from collections import OrderedDict
+from flask_socketio import SocketIO, join_room, emit
+from models.menu_processing import process_menu_bytes, process_menu, is_supported
+from models.menu_cache import MenuCache
 from models.dialogue_model import DialogueModel, OrderEntry
-from models.tts import text_to_speech
+from models.tts import text_to_speech, speech_stream as tts_speech_stream, phrase_cache, SAMPLE_RATE, SEGMENT_AUDIO_FORMAT
+from models.session_pool import SessionPool
+from models.jobs import JobManager
+from models.pipeline import speak_pipelined
+from models.order_store import OrderStore, MAX_PAGE
+from models.analytics import SalesAnalytics, BUCKET_SIZES
+from models.metrics import Trace, registry, trace_sample_rate, set_trace_sample_rate
 from dotenv import load_dotenv
-import time
+import logging
 import re
 
 os.makedirs('uploads', exist_ok=True)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"),
+                    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)  # Logs every OpenAI request at INFO
 
 app = Flask(__name__)
 app.config['DEBUG'] = False
 load_dotenv()
+socketio = SocketIO(app)
 
 # Initialize dialogue model
 dialogue_model = DialogueModel()
 
-# Order summary dashboard 
-orders_df = pd.DataFrame(columns=["customer_name", "items", "customizations", "price_per_item", "order_total"])
+# Parsed menus keyed by upload hash; the last active one is restored on startup
+menu_cache = MenuCache(os.path.join('uploads', 'menus'))
+
+# Per-customer conversation state, keyed by the session cookie
+SESSION_COOKIE = 'cashier_sid'
+session_pool = SessionPool(
+    dialogue_model.new_session,
+    max_sessions=int(os.environ.get("MAX_SESSIONS", 512)),
+    idle_timeout=int(os.environ.get("SESSION_IDLE_TIMEOUT", 900)),
+)
+
+def get_session():
+    """Resolve the dialogue session for the current request."""
+    if 'dialogue_session' not in g:
+        session_id = request.headers.get('X-Session-Id') or request.cookies.get(SESSION_COOKIE)
+        if not session_id:
+            session_id = uuid.uuid4().hex
+            g.new_session_id = session_id
+        g.dialogue_session = session_pool.get(session_id)
+    return g.dialogue_session
+
+@app.after_request
+def set_session_cookie(response):
+    session_id = g.pop('new_session_id', None)
+    if session_id:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+    return response
+
+# Responses waiting for the browser to open their audio stream
+MAX_PENDING_SPEECH = 256
+pending_speech = OrderedDict()
+pending_speech_lock = threading.Lock()
+
+def queue_speech(text):
+    stream_id = uuid.uuid4().hex
+    with pending_speech_lock:
+        pending_speech[stream_id] = text
+        while len(pending_speech) > MAX_PENDING_SPEECH:
+            pending_speech.popitem(last=False)
+    return stream_id
+
+# Order summary dashboard, persisted across restarts
+order_store = OrderStore(os.path.join('uploads', 'orders.db'))
+
+# Sales aggregates, updated per order and rebuilt from the order store on startup
+analytics = SalesAnalytics(lambda: dialogue_model.menu.index)
+DASHBOARD_ROOM = 'dashboard'
+
+# Socket.IO browser client, pinned; the integrity hash guards the CDN copy
+SOCKETIO_CLIENT_FILE = 'js/socket.io.min.js'
+SOCKETIO_CLIENT_CDN = 'https://cdn.socket.io/4.7.5/socket.io.min.js'
+SOCKETIO_CLIENT_INTEGRITY = 'sha384-2huaZvOR9iDzHqslqwpR87isEmrfxqyWOF7hr7BY6KG0+hVKLoEXMPUJw3ynWuhO'
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    # A copy of the client under static/js/ (for kiosks without CDN access) wins over the CDN
+    local_client = os.path.exists(os.path.join(app.static_folder, SOCKETIO_CLIENT_FILE))
+    return render_template('index.html', socketio_local=local_client,
+                           socketio_cdn=SOCKETIO_CLIENT_CDN, socketio_integrity=SOCKETIO_CLIENT_INTEGRITY)
+
+# Menu uploads run as background jobs, one at a time
+menu_jobs = JobManager(max_workers=1)
+
+def warm_up(job):
+    """
+    Restore the last active menu and build the agent after the server is up,
+    so startup never waits on pandas, LangChain or the network.
+    """
+    # Each step is independent; one failing must not skip the others
+    job.update("restoring menu", 0.1)
+    menu_df = None
+    try:
+        menu_df = menu_cache.load_active()
+        if menu_df is not None:
+            dialogue_model.set_menu(menu_df)
+    except Exception:
+        app.logger.exception("Restoring the active menu failed")
+    job.update("rebuilding analytics", 0.3)
+    last_order_id = None
+    try:
+        last_order_id = analytics.rebuild(order_store)
+    except Exception:
+        app.logger.exception("Rebuilding sales analytics failed")
+    job.update("building agent", 0.6)
+    dialogue_model.ensure_agent()
+    return {"menu_items": 0 if menu_df is None else len(menu_df), "orders": last_order_id}
+
+warm_up_job = menu_jobs.submit('warm_up', warm_up)
+
+def run_menu_upload(job, data, filename, key, trace):
+    """
+    Parse an uploaded menu, build its index and make it the active menu.
+    """
+    trace.observe("queued", job.started_at - job.created_at)
+    try:
+        job.update("checking cache", 0.02)
+        with trace.span("cache_lookup"):
+            menu_df = menu_cache.get(key)
+        cached = menu_df is not None
+        if not cached:
+            job.update("reading file", 0.05)
+            with trace.span("read_file"):
+                menu_text, ok = process_menu_bytes(data, filename)
+            if not ok:
+                raise ValueError("Unsupported file format")
+            job.update("extracting items", 0.3)
+            with trace.span("extract"):
+                menu_df = process_menu(menu_text, on_progress=lambda done, total: job.update(progress=0.3 + 0.6 * done / total))
+            if menu_df.empty:
+                # Keep serving the current menu rather than swapping in an empty one
+                raise ValueError("No menu items found")
+            with trace.span("cache_store"):
+                stored = menu_cache.put(key, menu_df)
+
+        job.update("building index", 0.9)
+        with trace.span("index"):
+            snapshot = dialogue_model.build_menu(menu_df)
+        job.update("activating", 0.98)
+        with trace.span("activate"):
+            dialogue_model.swap_menu(snapshot)
+            if cached or stored:
+                # Only a cached menu can be restored on startup
+                menu_cache.set_active(key)
+    finally:
+        trace.finish(job_id=job.id)
+    return {"items": len(menu_df), "cached": cached, "version": snapshot.version}
 
 @app.route('/upload-menu', methods=['POST'])
 def upload_menu():
     file = request.files['menu']
-    menu_text, ok = process_menu_text(file)
-    if not ok:
+    if not is_supported(file.filename):
         return "Unsupported file format", 400
 
-    # Pass the extracted menu text to the dialogue model
-    menu_df = process_menu(menu_text)
-    dialogue_model.set_menu(menu_df)
-    
-    return jsonify({"message": "Menu uploaded successfully!"})
+    trace = Trace('upload_menu')
+    with trace.span('receive'):
+        data = file.read()
+        key = menu_cache.key(data)
+    job = menu_jobs.submit('menu_upload', run_menu_upload, data, file.filename, key, trace)
+    status_url = url_for('menu_upload_status', job_id=job.id)
+    return jsonify({"message": "Menu upload started.", "job_id": job.id, "status_url": status_url}), 202, {'Location': status_url}
+
+@app.route('/upload-menu/<job_id>', methods=['GET'])
+def menu_upload_status(job_id):
+    job = menu_jobs.get(job_id)
+    if job is None:
+        return "Unknown job", 404
+    return jsonify(job.to_dict())
+
+@app.route('/upload-menu/<job_id>', methods=['DELETE'])
+def cancel_menu_upload(job_id):
+    job = menu_jobs.cancel(job_id)
+    if job is None:
+        return "Unknown job", 404
+    return jsonify(job.to_dict())
 
 def check_order_completion(user_input):
     completion_pattern = r"(for\s?here|dine\s?in|stay\s?here|to\s?go|to-go|take\s?away|take\s?out|carry\s?out|for-here|to-go)"
@@ -45,52 +195,179 @@ def check_order_completion(user_input):
 @app.route('/voice-interaction', methods=['POST'])
 def voice_interaction():
     user_input = request.json.get("user_input")
+    if request.json.get("pipeline"):
+        return voice_interaction_pipelined(user_input)
+    trace = Trace('voice_interaction')
     if check_order_completion(user_input):
-        place_order()
+        submit_order(trace)
         response = "Order confirmed."
     else:
-        response = dialogue_model.get_response(user_input)
+        response = dialogue_model.get_response(user_input, get_session(), trace=trace)
 
-    # Convert the response text to speech using gTTS
-    audio_filename = text_to_speech(response)
+    if request.json.get("stream"):
+        # Hand back a URL that streams the audio while it is being synthesized
+        audio_url = url_for('speech_stream', stream_id=queue_speech(response))
+        trace.finish(mode="stream")
+        return jsonify({"response": response, "audio_url": audio_url, "audio_stream": True})
 
-    timestamp = int(time.time())
-    audio_url = url_for('static', filename=audio_filename) + f'?t={timestamp}'
+    # Convert the response text to speech; the filename is unique per phrase
+    with trace.span('tts'):
+        audio_filename = text_to_speech(response)
+    audio_url = url_for('static', filename=audio_filename)
+    trace.finish(mode="file")
     
     return jsonify({"response": response, "audio_url": audio_url})
 
-@app.route('/place-order', methods=['POST'])
-def place_order():
-    global orders_df
-    order_response = dialogue_model.place_order()  # Call your order processing method    
-    new_order_df = pd.DataFrame([{
-        'customer_name': order_response.customer_name,
-        'items': order_response.items,
-        'customizations': order_response.customizations,
-        'price_per_item': order_response.price_per_item,
-        'order_total': order_response.order_total
-    }])
+def voice_interaction_pipelined(user_input):
+    """
+    Stream the reply as NDJSON: one line per spoken segment, in order, with
+    its audio URL as soon as it is synthesized, then a final line with the
+    whole response. Each sentence is synthesized while the next is generated.
+    """
+    trace = Trace('voice_interaction')
+    if check_order_completion(user_input):
+        submit_order(trace)
+        respond = lambda on_token: "Order confirmed."
+    else:
+        session = get_session()
+        respond = lambda on_token: dialogue_model.get_response(user_input, session, on_token=on_token, trace=trace)
+
+    def synthesize(text):
+        with trace.span('tts'):
+            return text_to_speech(text, audio_format=SEGMENT_AUDIO_FORMAT)
+
+    def generate():
+        try:
+            for event in speak_pipelined(respond, synthesize):
+                if event[0] == "segment":
+                    _, index, text, audio_filename = event
+                    if index == 0:
+                        trace.observe('first_audio', trace.elapsed(), trace.start)
+                    line = {"index": index, "text": text, "audio_url": url_for('static', filename=audio_filename)}
+                else:
+                    line = {"done": True, "response": event[1]}
+                yield json.dumps(line) + "\n"
+        except Exception as e:
+            app.logger.exception("Pipelined response failed")
+            trace.event("error", error=repr(e))
+            yield json.dumps({"error": "Sorry, something went wrong."}) + "\n"
+        finally:
+            trace.finish(mode="pipeline")
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-store'})
+
+@app.route('/speech/<stream_id>', methods=['GET'])
+def speech_stream(stream_id):
+    with pending_speech_lock:
+        text = pending_speech.pop(stream_id, None)
+    if text is None:
+        return "Unknown audio stream", 404
+    return Response(stream_with_context(tts_speech_stream(text)), mimetype='audio/wav',
+                    headers={'Cache-Control': 'no-store', 'X-Sample-Rate': str(SAMPLE_RATE)})
 
-    orders_df = pd.concat([orders_df, new_order_df], ignore_index=True)
-    orders_df.to_csv('uploads/orders.csv', index=False)
+def submit_order(trace):
+    """
+    Turn the session's cart into an order, store it and push it to the dashboards.
+    """
+    session = get_session()
+    with trace.span('build_order'):
+        order_response = dialogue_model.place_order(session)
+    # The conversation is over; the customer's next visit starts a fresh session
+    session_pool.discard(session.session_id)
+    with trace.span('store'):
+        record = order_store.append(order_response)
+    with trace.span('analytics'):
+        analytics.record(record)
 
-    return jsonify({"message": "Order confirmed."})
+    # Push just the new order to every open dashboard
+    with trace.span('broadcast'):
+        socketio.emit('order_placed', record, to=DASHBOARD_ROOM)
+    return record
+
+@app.route('/place-order', methods=['POST'])
+def place_order():
+    trace = Trace('place_order')
+    record = submit_order(trace)
+    trace.finish(order_id=record["id"])
+    return jsonify({"message": "Order confirmed.", "order_id": record["id"]})
 
 @app.route('/order-summary', methods=['GET'])
 def order_summary():
-    try:
-        global orders_df
-        # orders_df = pd.read_csv('uploads/orders.csv')
-        return orders_df.to_dict(orient='records')
-    except FileNotFoundError:
-        print("No orders found")
-        return jsonify([])  # Return an empty list if no orders found
+    """
+    Dashboard orders oldest first, paginated with the `since` cursor
+    (the id of the last order already shown).
+    """
+    page = order_store.page(
+        since=request.args.get('since', 0, type=int),
+        limit=request.args.get('limit', 100, type=int),
+        customer=request.args.get('customer'),
+        start=request.args.get('start', type=float),
+        end=request.args.get('end', type=float),
+    )
+    return jsonify(page)
     
+@app.route('/analytics', methods=['GET'])
+def sales_analytics():
+    """
+    Revenue, average ticket, top items and customizations, and an hourly or
+    daily rollup (`bucket`, `last` buckets), from the running aggregates.
+    """
+    bucket = request.args.get('bucket', 'hour')
+    if bucket not in BUCKET_SIZES:
+        return "bucket must be 'hour' or 'day'", 400
+    return jsonify(analytics.report(
+        top=max(1, min(request.args.get('top', 10, type=int), 100)),
+        bucket=bucket,
+        last=max(0, min(request.args.get('last', 24, type=int), 1000)),
+    ))
+
 @app.route('/reset-order-summary', methods=['POST'])
 def reset_order_summary():
-    global orders_df
-    orders_df = pd.DataFrame(columns=["customer_name", "items", "customizations", "price_per_item", "order_total"])
-    return jsonify({"message": "Order summary has been reset."}), 200
+    cursor = order_store.reset_board()
+    socketio.emit('orders_reset', {"cursor": cursor}, to=DASHBOARD_ROOM)
+    return jsonify({"message": "Order summary has been reset.", "cursor": cursor}), 200
+
+@socketio.on('subscribe_orders')
+def subscribe_orders(data):
+    """
+    Join the dashboard room and resync from the client's cursor. Order ids are
+    contiguous, so clients that see a gap in the pushed orders subscribe again.
+    """
+    join_room(DASHBOARD_ROOM)
+    since = int((data or {}).get('cursor') or 0)
+    page = order_store.page(since=since, limit=MAX_PAGE)
+    page["reset"] = since < order_store.board_start()
+    emit('orders_snapshot', page)
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "sessions": session_pool.stats(),
+        "dialogue": dialogue_model.stats(),
+        "tts_cache": phrase_cache.stats(),
+        "warm_up": warm_up_job.to_dict(),
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Stage, model and tool latencies and token counts in the Prometheus text format.
+    """
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/tracing', methods=['GET', 'POST'])
+def tracing():
+    """
+    Read or change the share of requests whose full trace is logged, e.g.
+    POST {"sample_rate": 0.05}. Tracing is off by default (TRACE_SAMPLE_RATE).
+    """
+    if request.method == 'POST':
+        try:
+            set_trace_sample_rate((request.get_json(silent=True) or {}).get("sample_rate", 0))
+        except (TypeError, ValueError):
+            return "sample_rate must be a number", 400
+    return jsonify({"sample_rate": trace_sample_rate()})
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
+    socketio.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), allow_unsafe_werkzeug=True)
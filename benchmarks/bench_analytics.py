@@ -0,0 +1,95 @@
+"""
+Cost of the sales analytics as order history grows.
+
+Appends orders to a fresh store, folding each into SalesAnalytics, and at
+each checkpoint reports the per-order update time, the /analytics report
+time and, for comparison, a full pandas rescan of the history computing the
+same top items and hourly revenue. It also times the vectorized rebuild and
+checks that it matches the incrementally maintained report.
+
+Usage: python -m benchmarks.bench_analytics [--orders 100000] [--checkpoints 1000,10000,100000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_order_store import synthetic_order
+from models.analytics import SalesAnalytics
+from models.menu_index import MenuIndex
+from models.order_store import OrderStore
+
+MENU = MenuIndex(pd.DataFrame([
+    {"item": "Latte", "price": "$4.50"},
+    {"item": "Mocha", "price": "$5.00"},
+    {"item": "Blueberry Muffin", "price": "$3.00"},
+    {"item": "Caesar Salad", "price": "$8.50"},
+]))
+
+
+def rescan(store):
+    """What a report costs without aggregates: read every order and group it."""
+    orders = pd.concat(store.frames())
+    lines = orders["lines"].map(json.loads).explode().dropna()
+    lines = pd.DataFrame(lines.tolist())
+    top = lines.groupby("item")["quantity"].sum().nlargest(10)
+    hourly = orders.groupby(orders["created_at"] // 3600)["order_total"].agg(["size", "sum"])
+    return top, hourly
+
+
+def timed(fn, repeats=20):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return 1000 * (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--checkpoints", default="1000,10000,100000")
+    args = parser.parse_args()
+    checkpoints = sorted(int(n) for n in args.checkpoints.split(",") if int(n) <= args.orders)
+
+    rng = random.Random(0)
+    analytics = SalesAnalytics(lambda: MENU)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = OrderStore(os.path.join(directory, "orders.db"))
+        start_time = time.time() - args.orders * 30
+        record_seconds = 0.0
+        for n in range(1, args.orders + 1):
+            record = store.append(synthetic_order(rng), created_at=start_time + n * 30)
+            start = time.perf_counter()
+            analytics.record(record)
+            record_seconds += time.perf_counter() - start
+            if n in checkpoints:
+                results.append({
+                    "orders": n,
+                    "record_us_avg": round(1e6 * record_seconds / n, 1),
+                    "report_ms": round(timed(lambda: analytics.report(top=10, bucket="hour", last=24)), 3),
+                    "rescan_ms": round(timed(lambda: rescan(store), repeats=3), 1),
+                })
+
+        live = analytics.report(last=1000)
+        rebuilt = SalesAnalytics(lambda: MENU)
+        start = time.perf_counter()
+        rebuilt.rebuild(store)
+        rebuild_seconds = time.perf_counter() - start
+        store.close()
+
+    strip = lambda report: {k: v for k, v in report.items() if k not in ("rebuilt_at", "rebuilding")}
+    print(json.dumps({
+        "checkpoints": results,
+        "rebuild_s": round(rebuild_seconds, 2),
+        "rebuild_orders_per_s": round(args.orders / rebuild_seconds),
+        "rebuild_matches_incremental": strip(live) == strip(rebuilt.report(last=1000)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
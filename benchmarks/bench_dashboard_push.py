@@ -0,0 +1,116 @@
+"""
+Load test for the live order dashboard push channel.
+
+Connects N Socket.IO dashboard subscribers to a running server, places
+orders over HTTP and measures how long each pushed order takes to reach
+every subscriber (server timestamp to client receipt, so run it on the
+same host as the server). Also checks reconnect resync: a late subscriber
+must receive every order in its snapshot.
+
+Usage: python -m benchmarks.bench_dashboard_push --url http://localhost:5000 [--subscribers 300] [--orders 20]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+import socketio
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def subscriber(url, latencies, received, ready):
+    client = socketio.AsyncClient(reconnection=False)
+    state = {"cursor": 0}
+
+    @client.on('orders_snapshot')
+    async def on_snapshot(page):
+        state["cursor"] = max(state["cursor"], page["cursor"])
+        ready.release()
+
+    @client.on('order_placed')
+    async def on_order(order):
+        latencies.append(time.time() - order["created_at"])
+        received.append(order["id"])
+        state["cursor"] = order["id"]
+
+    @client.on('connect')
+    async def on_connect():
+        await client.emit('subscribe_orders', {"cursor": state["cursor"]})
+
+    await client.connect(url, transports=['websocket'])
+    return client
+
+
+async def run(url, subscribers, orders, interval):
+    latencies, received = [], []
+    ready = asyncio.Semaphore(0)
+    connect_start = time.perf_counter()
+    clients = await asyncio.gather(*(subscriber(url, latencies, received, ready) for _ in range(subscribers)))
+    for _ in range(subscribers):
+        await ready.acquire()
+    connect_seconds = time.perf_counter() - connect_start
+
+    # A shared session id keeps every order on one (empty) cart
+    headers = {"X-Session-Id": "bench-dashboard-push"}
+    async with aiohttp.ClientSession(headers=headers) as http:
+        before = await (await http.get(f"{url}/order-summary", params={"limit": 1})).json()
+        start_cursor = before["cursor"]
+        post_start = time.perf_counter()
+        for _ in range(orders):
+            async with http.post(f"{url}/place-order", json={}) as response:
+                response.raise_for_status()
+            await asyncio.sleep(interval)
+        post_seconds = time.perf_counter() - post_start
+
+        # Wait for the fan-out to drain
+        deadline = time.time() + 10
+        while len(received) < subscribers * orders and time.time() < deadline:
+            await asyncio.sleep(0.05)
+
+    # Reconnect resync: a new subscriber starting from the old cursor sees every new order
+    resync = socketio.AsyncClient(reconnection=False)
+    snapshot = asyncio.get_running_loop().create_future()
+    resync.on('orders_snapshot', lambda page: snapshot.done() or snapshot.set_result(page))
+    await resync.connect(url, transports=['websocket'])
+    await resync.emit('subscribe_orders', {"cursor": start_cursor})
+    page = await asyncio.wait_for(snapshot, 10)
+    await resync.disconnect()
+
+    await asyncio.gather(*(client.disconnect() for client in clients))
+    return {
+        "subscribers": subscribers,
+        "orders": orders,
+        "connect_seconds": round(connect_seconds, 3),
+        "orders_per_second": round(orders / post_seconds, 1),
+        "deliveries": len(received),
+        "expected_deliveries": subscribers * orders,
+        "latency_ms": {
+            "p50": round(1000 * percentile(latencies, 50), 2) if latencies else None,
+            "p95": round(1000 * percentile(latencies, 95), 2) if latencies else None,
+            "p99": round(1000 * percentile(latencies, 99), 2) if latencies else None,
+            "mean": round(1000 * statistics.mean(latencies), 2) if latencies else None,
+        },
+        "resync_orders": len(page["orders"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between orders")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.url, args.subscribers, args.orders, args.interval)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Prompt tokens per agent turn over a long ordering session, comparing the
+unbounded ConversationBufferMemory with TokenBudgetMemory.
+
+The agent runs against a scripted chat model, so no API key is needed: each
+customer turn adds an item with the AddToCart tool and gets a short reply.
+
+Usage: python -m benchmarks.bench_memory [--turns 40] [--max-tokens 1000] [--max-turns 6]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+from typing import Any
+
+import pandas as pd
+from langchain.memory import ConversationBufferMemory
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+import models.dialogue_model as dialogue_model  # noqa: E402
+from models.memory import TokenBudgetMemory  # noqa: E402
+
+MENU = pd.DataFrame([
+    {"item": "Latte", "price": "$4.50", "allergens": "dairy", "description": "Espresso with steamed milk"},
+    {"item": "Cappuccino", "price": "$4.25", "allergens": "dairy", "description": "Espresso with foamed milk"},
+    {"item": "Blueberry Muffin", "price": "$3.25", "allergens": "gluten, eggs", "description": "Baked daily"},
+    {"item": "Caesar Salad", "price": "$8.50", "allergens": "dairy, eggs", "description": "Romaine and parmesan"},
+])
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Calls AddToCart for each new customer message, then confirms."""
+    calls: Any = 0
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        last = messages[-1]
+        if isinstance(last, HumanMessage):
+            item = last.content.split("a ", 1)[-1].rstrip(".")
+            message = AIMessage(content="", tool_calls=[
+                {"name": "AddToCart", "args": {"item": item, "customizations": ["extra hot"]}, "id": f"call_{self.calls}"}])
+        else:
+            message = AIMessage(content="Sure, added that to your order. Anything else?")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def run_per_turn(memory_factory, turns):
+    model = dialogue_model.DialogueModel(MENU, llm=ScriptedChatModel())
+    session = model.new_session("bench")
+    session.memory = memory_factory(session)
+    names = MENU["item"].tolist()
+    per_turn = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for turn in range(turns):
+            before = model.prompt_tokens
+            model.get_response(f"Could I also get a {names[turn % len(names)]}.", session)
+            per_turn.append(model.prompt_tokens - before)
+    return per_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--max-tokens", type=int, default=1000)
+    parser.add_argument("--max-turns", type=int, default=6)
+    args = parser.parse_args()
+
+    strategies = {
+        "buffer": lambda session: ConversationBufferMemory(
+            memory_key="chat_history", return_messages=True, input_key="input"),
+        "token_budget": lambda session: TokenBudgetMemory(
+            cart=session.cart, max_tokens=args.max_tokens, max_turns=args.max_turns),
+    }
+    results = {}
+    for name, factory in strategies.items():
+        per_turn = run_per_turn(factory, args.turns)
+        results[name] = {
+            "first_turn": per_turn[0],
+            "last_turn": per_turn[-1],
+            "max_turn": max(per_turn),
+            "total": sum(per_turn),
+            "every_10th_turn": per_turn[::10],
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
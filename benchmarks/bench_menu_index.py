@@ -0,0 +1,97 @@
+"""
+Benchmark MenuIndex against the previous pandas scan in MenuTool.get_item_info.
+
+Builds synthetic menus of increasing size and reports build time, exact,
+typo and miss lookup latency, and the size of the miss answer that would be
+sent to the LLM.
+
+Usage: python -m benchmarks.bench_menu_index [--sizes 10 100 1000 10000]
+"""
+import argparse
+import json
+import random
+import time
+
+import pandas as pd
+
+from models.menu_index import MenuIndex
+
+STYLES = ["Iced", "Hot", "Classic", "Spiced", "Honey", "Smoked", "Toasted", "Frozen", "Wild", "Golden"]
+FLAVORS = ["Vanilla", "Caramel", "Hazelnut", "Matcha", "Lavender", "Maple", "Cinnamon", "Mocha", "Berry", "Lemon"]
+BASES = ["Latte", "Cappuccino", "Americano", "Muffin", "Croissant", "Scone", "Salad", "Sandwich", "Bagel", "Tea"]
+
+
+def synthetic_menu(size, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        name = f"{STYLES[i % 10]} {FLAVORS[(i // 10) % 10]} {BASES[(i // 100) % 10]}"
+        if i >= 1000:
+            name += f" No. {i // 1000}"
+        rows.append({
+            "item": name,
+            "description": f"House {name.lower()} made fresh daily",
+            "price": f"${rng.uniform(2, 15):.2f}",
+            "allergens": rng.choice(["dairy", "gluten", "nuts", "eggs", "none"]),
+        })
+    return pd.DataFrame(rows)
+
+
+def typo(name, rng):
+    chars = list(name)
+    i = rng.randrange(1, len(chars) - 2)
+    chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def legacy_lookup(menu_df, item_name):
+    """MenuTool.get_item_info before MenuIndex."""
+    if item_name.lower() not in menu_df['item'].str.lower().values:
+        return menu_df[['item', 'price', 'allergens']].to_string(index=False)
+    item = menu_df[menu_df['item'].str.lower() == item_name.lower()]
+    return f"{item['item'].values[0]}: ${item['price'].values[0]}. Allergens: {item['allergens'].values[0]}"
+
+
+def per_call_us(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return round((time.perf_counter() - start) * 1e6 / len(queries), 1)
+
+
+def run(size, queries=200):
+    rng = random.Random(size)
+    menu_df = synthetic_menu(size)
+    names = menu_df["item"].tolist()
+    exact = [rng.choice(names) for _ in range(queries)]
+    typos = [typo(name, rng) for name in exact]
+    misses = ["Pumpkin Spice Frappe" for _ in range(queries)]
+
+    start = time.perf_counter()
+    index = MenuIndex(menu_df)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    legacy_queries = exact[:20]
+    return {
+        "items": size,
+        "build_ms": round(build_ms, 2),
+        "exact_us": per_call_us(index.answer, exact),
+        "typo_us": per_call_us(index.answer, typos),
+        "typo_resolved": sum(index.match(t) == index.lookup(e) for t, e in zip(typos, exact)) / queries,
+        "miss_us": per_call_us(index.answer, misses),
+        "miss_answer_chars": len(index.answer(misses[0])),
+        "legacy_exact_us": per_call_us(lambda q: legacy_lookup(menu_df, q), legacy_queries),
+        "legacy_miss_us": per_call_us(lambda q: legacy_lookup(menu_df, q), misses[:5]),
+        "legacy_miss_answer_chars": len(legacy_lookup(menu_df, misses[0])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    args = parser.parse_args()
+    print(json.dumps([run(size) for size in args.sizes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark the OCR stage against the previous single-threaded path.
+
+Runs every image and PDF in --corpus through the legacy path
+(pytesseract on the full-resolution image, PdfReader.extract_text for PDFs)
+and through models.ocr (preprocessing, banding, parallel OCR, scanned-page
+fallback). Reports pages/sec and word-level accuracy against `<name>.txt`
+ground truth files where present. Without --corpus a small synthetic set
+of rendered menu pages is generated.
+
+Requires the tesseract binary on PATH.
+
+Usage: python -m benchmarks.bench_ocr [--corpus DIR] [--workers 4]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import time
+from difflib import SequenceMatcher
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from PyPDF2 import PdfReader
+
+from models import ocr
+
+ITEMS = ["Latte", "Cappuccino", "Mocha", "Americano", "Chai Tea", "Blueberry Muffin",
+         "Caesar Salad", "Turkey Sandwich", "Almond Croissant", "Iced Coffee", "Tomato Soup"]
+
+
+def words(text):
+    return re.findall(r"[a-z0-9.$]+", text.lower())
+
+
+def accuracy(text, truth):
+    return SequenceMatcher(None, words(text), words(truth), autojunk=False).ratio()
+
+
+def synthetic_corpus(directory, pages=6, seed=0):
+    """Render noisy, oversized menu pages (as a phone photo would be) with ground truth."""
+    rng = random.Random(seed)
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 64)
+    except OSError:
+        font = ImageFont.load_default()
+    for n in range(pages):
+        lines = [f"{rng.choice(ITEMS)} ${rng.uniform(2, 12):.2f}" for _ in range(30)]
+        image = Image.new("RGB", (3000, 4200), (236, 228, 212))
+        draw = ImageDraw.Draw(image)
+        for i, line in enumerate(lines):
+            draw.text((150, 120 + i * 130), line, fill=(40, 30, 30), font=font)
+        image = image.filter(ImageFilter.GaussianBlur(1.2))
+        image.save(os.path.join(directory, f"page{n}.jpg"), quality=85)
+        with open(os.path.join(directory, f"page{n}.txt"), "w") as f:
+            f.write("\n".join(lines))
+    # A scanned PDF: the same pages as images with no text layer
+    scans = [Image.open(os.path.join(directory, f"page{n}.jpg")) for n in range(2)]
+    scans[0].save(os.path.join(directory, "scanned.pdf"), save_all=True, append_images=scans[1:])
+    with open(os.path.join(directory, "scanned.txt"), "w") as f:
+        f.write("\n".join(open(os.path.join(directory, f"page{n}.txt")).read() for n in range(2)))
+
+
+def legacy(path):
+    if path.endswith(".pdf"):
+        reader = PdfReader(path)
+        return "".join(page.extract_text() or "" for page in reader.pages), len(reader.pages)
+    return pytesseract.image_to_string(Image.open(path)), 1
+
+
+def current(path, workers):
+    if path.endswith(".pdf"):
+        with open(path, "rb") as f:
+            data = f.read()
+        reader = PdfReader(io.BytesIO(data))
+        return "\n".join(ocr.pdf_pages_text(reader, data, workers)), len(reader.pages)
+    return ocr.ocr_images([Image.open(path)], workers)[0], 1
+
+
+def run(corpus, workers):
+    files = sorted(f for f in os.listdir(corpus) if f.lower().endswith((".png", ".jpg", ".jpeg", ".pdf")))
+    results = {}
+    for name, extract in (("legacy", legacy), ("current", lambda p: current(p, workers))):
+        pages, scores = 0, []
+        start = time.perf_counter()
+        for filename in files:
+            path = os.path.join(corpus, filename)
+            text, page_count = extract(path)
+            pages += page_count
+            truth_path = os.path.splitext(path)[0] + ".txt"
+            if os.path.exists(truth_path):
+                with open(truth_path) as f:
+                    scores.append(accuracy(text, f.read()))
+        seconds = time.perf_counter() - start
+        results[name] = {
+            "files": len(files),
+            "pages": pages,
+            "seconds": round(seconds, 2),
+            "pages_per_second": round(pages / seconds, 2) if seconds else None,
+            "accuracy": round(sum(scores) / len(scores), 3) if scores else None,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of menu images/PDFs with optional .txt ground truth")
+    parser.add_argument("--workers", type=int, default=ocr.MAX_WORKERS)
+    args = parser.parse_args()
+
+    if args.corpus:
+        print(json.dumps(run(args.corpus, args.workers), indent=2))
+        return
+    with tempfile.TemporaryDirectory() as corpus:
+        synthetic_corpus(corpus)
+        print(json.dumps(run(corpus, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
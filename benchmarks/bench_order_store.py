@@ -0,0 +1,110 @@
+"""
+Benchmark the SQLite order store against the previous pd.concat + to_csv path.
+
+Appends N orders to a fresh store and reports per-append latency, reload time
+and indexed query latency (cursor page, customer, time range). The legacy
+path is O(n^2), so it is only run for the first --legacy-orders orders.
+
+Usage: python -m benchmarks.bench_order_store [--orders 100000] [--legacy-orders 2000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from models.cart import OrderEntry, OrderLine
+from models.order_store import OrderStore
+
+NAMES = ["Sam", "Alex", "Priya", "Jordan", "Mei", "Chris", "Taylor", "Omar"]
+ITEMS = [("Latte", 4.5), ("Mocha", 5.0), ("Blueberry Muffin", 3.0), ("Caesar Salad", 8.5)]
+
+
+def synthetic_order(rng):
+    lines = []
+    for item, price in rng.sample(ITEMS, rng.randint(1, 3)):
+        quantity = rng.randint(1, 2)
+        lines.append(OrderLine(item=item, quantity=quantity, unit_price=price, line_total=price * quantity))
+    total = sum(line.line_total for line in lines)
+    return OrderEntry(
+        customer_name=rng.choice(NAMES),
+        items=", ".join(line.item for line in lines),
+        customizations="",
+        price_per_item=round(total / sum(line.quantity for line in lines), 2),
+        order_total=total,
+        lines=lines,
+    )
+
+
+def legacy_appends(orders, path):
+    orders_df = pd.DataFrame(columns=["customer_name", "items", "customizations", "price_per_item", "order_total"])
+    start = time.perf_counter()
+    for order in orders:
+        new_order_df = pd.DataFrame([{
+            'customer_name': order.customer_name,
+            'items': order.items,
+            'customizations': order.customizations,
+            'price_per_item': order.price_per_item,
+            'order_total': order.order_total,
+        }])
+        orders_df = pd.concat([orders_df, new_order_df], ignore_index=True)
+        orders_df.to_csv(path, index=False)
+    return time.perf_counter() - start
+
+
+def timed(fn, repeats=50):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return round((time.perf_counter() - start) * 1000 / repeats, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--legacy-orders", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    orders = [synthetic_order(rng) for _ in range(args.orders)]
+    base_time = time.time() - args.orders
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "orders.db")
+        store = OrderStore(db_path)
+        checkpoints = {}
+        start = time.perf_counter()
+        for n, order in enumerate(orders, 1):
+            store.append(order, created_at=base_time + n)
+            if n in (1000, 10000, 100000) or n == args.orders:
+                checkpoints[n] = round((time.perf_counter() - start) * 1e6 / n, 1)
+        store.close()
+
+        start = time.perf_counter()
+        store = OrderStore(db_path)
+        count = store.count()
+        reload_ms = (time.perf_counter() - start) * 1000
+
+        middle = args.orders // 2
+        results = {
+            "orders": count,
+            "append_us_avg_at": checkpoints,
+            "reload_ms": round(reload_ms, 2),
+            "page_ms": timed(lambda: store.page(since=middle, limit=100)),
+            "customer_page_ms": timed(lambda: store.page(since=middle, limit=100, customer="Priya")),
+            "time_range_ms": timed(lambda: store.query(start=base_time + middle, end=base_time + middle + 3600, limit=1000)),
+        }
+        store.close()
+
+        legacy = legacy_appends(orders[:args.legacy_orders], os.path.join(tmp, "orders.csv"))
+        results["legacy_orders"] = args.legacy_orders
+        results["legacy_append_us_avg"] = round(legacy * 1e6 / args.legacy_orders, 1)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
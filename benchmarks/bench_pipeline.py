@@ -0,0 +1,113 @@
+"""
+Time to first audio for a spoken reply, serial versus sentence-pipelined.
+
+The agent runs against a fake streaming chat model and a fake TTS backend,
+each with configurable latency, so no API keys are needed:
+
+- serial: wait for the whole reply, then synthesize it in one call (the
+  non-pipelined /voice-interaction path);
+- pipelined: speak_pipelined, which synthesizes each sentence while the LLM
+  is still generating the rest.
+
+Usage: python -m benchmarks.bench_pipeline [--first-token-ms 400] [--token-ms 30]
+       [--tts-ms 250] [--tts-ms-per-char 4] [--runs 3]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import time
+from typing import Any
+
+import pandas as pd
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+import models.dialogue_model as dialogue_model  # noqa: E402
+from models.pipeline import speak_pipelined  # noqa: E402
+
+REPLY = ("Sure thing! A large oat milk latte is $5.25, and it takes about five minutes. "
+         "Would you like anything else with that, maybe a blueberry muffin? "
+         "And can I get a name for the order?")
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Streams REPLY word by word after a first-token delay."""
+    first_token_s: Any = 0.4
+    token_s: Any = 0.03
+
+    @property
+    def _llm_type(self):
+        return "fake-streaming"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _tokens(self):
+        return re.findall(r"\S+\s*", REPLY)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_s + self.token_s * len(self._tokens()))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=REPLY))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_s)
+        for token in self._tokens():
+            time.sleep(self.token_s)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def fake_tts(base_s, per_char_s):
+    def synthesize(text):
+        time.sleep(base_s + per_char_s * len(text))
+        return f"{len(text)} chars"
+    return synthesize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--first-token-ms", type=float, default=400)
+    parser.add_argument("--token-ms", type=float, default=30)
+    parser.add_argument("--tts-ms", type=float, default=250, help="Fixed TTS latency per request")
+    parser.add_argument("--tts-ms-per-char", type=float, default=4)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    llm = FakeStreamingChatModel(first_token_s=args.first_token_ms / 1000, token_s=args.token_ms / 1000)
+    model = dialogue_model.DialogueModel(pd.DataFrame(), llm=llm)
+    synthesize = fake_tts(args.tts_ms / 1000, args.tts_ms_per_char / 1000)
+
+    serial, first, last, segments = [], [], [], 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for run in range(args.runs):
+            session = model.new_session(f"serial-{run}")
+            start = time.perf_counter()
+            synthesize(model.get_response("Can I get a large oat latte?", session))
+            serial.append(time.perf_counter() - start)
+
+            session = model.new_session(f"pipelined-{run}")
+            respond = lambda on_token: model.get_response("Can I get a large oat latte?", session, on_token=on_token)
+            start = time.perf_counter()
+            times = [time.perf_counter() - start for event in speak_pipelined(respond, synthesize) if event[0] == "segment"]
+            first.append(times[0])
+            last.append(times[-1])
+            segments = len(times)
+
+    ms = lambda values: round(1000 * statistics.median(values), 1)
+    print(json.dumps({
+        "reply_chars": len(REPLY),
+        "segments": segments,
+        "serial_first_audio_ms": ms(serial),
+        "pipelined_first_audio_ms": ms(first),
+        "pipelined_last_audio_ms": ms(last),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Hit rate, wrong answers and agent time saved by the semantic response cache.
+
+Replays FAQ traffic, each question asked in several wordings by different
+customers, through DialogueModel with a chat model that answers after
+--llm-ms and names the question it was asked. A hit is wrong if the reply
+came from a different question. Order turns and questions about the order
+are mixed in and must never hit, and neither may an FAQ asked after the
+customer has said something about themselves ("I'm vegan").
+
+Usage: python -m benchmarks.bench_response_cache [--customers 200] [--llm-ms 800] [--threshold 0.8]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import time
+from typing import Any
+
+import pandas as pd
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+os.environ.setdefault("OPENAI_API_KEY", "unused")
+
+import models.dialogue_model as dialogue_model  # noqa: E402
+from models.response_cache import ResponseCache  # noqa: E402
+
+MENU = pd.DataFrame([
+    {"item": "Latte", "price": "$4.50", "allergens": "dairy", "description": "Espresso with steamed milk"},
+    {"item": "Blueberry Muffin", "price": "$3.25", "allergens": "gluten, eggs", "description": "Baked daily"},
+])
+
+# Wordings of the same question
+FAQ = {
+    "oat milk": ["Do you have oat milk?", "Is there oat milk?", "Got any oat milk?", "Do you guys have oat milk?"],
+    "almond milk": ["Do you have almond milk?", "Is there almond milk?", "Any almond milk?"],
+    "card": ["Can I pay with card?", "Can I pay with a card?", "Could I pay with card please?"],
+    "cash": ["Can I pay with cash?", "Can I pay with cash please?"],
+    "wifi": ["Do you have wifi?", "Is there wifi here?", "Do you guys have wifi?"],
+    "closing": ["What time do you close?", "What time do you close today?"],
+    "opening": ["What time do you open?", "What time do you guys open?"],
+    "decaf": ["Do you have decaf?", "Is there decaf?", "Do you serve decaf?"],
+}
+# Turns that depend on the customer's order; never served from the cache
+PRIVATE = ["What's my total?", "Is it ready?", "Can I get a latte?", "Does that come with anything?"]
+# Said before a question by some customers; the answer may then depend on it
+PREFERENCES = ["I'm vegan, just so you know.", "I have a nut allergy.", "I'm lactose intolerant."]
+
+
+class EchoChatModel(BaseChatModel):
+    """Answers after a fixed delay, quoting the question."""
+    delay: Any = 0.8
+
+    @property
+    def _llm_type(self):
+        return "echo"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay)
+        question = next(m.content for m in reversed(messages) if isinstance(m, HumanMessage))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"About '{question}': yes!"))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--llm-ms", type=float, default=800)
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    group_of = {wording: group for group, wordings in FAQ.items() for wording in wordings}
+    model = dialogue_model.DialogueModel(MENU, llm=EchoChatModel(delay=args.llm_ms / 1000))
+    if args.threshold is not None:
+        model.response_cache = ResponseCache(threshold=args.threshold)
+
+    wrong, private_hits, faq_turns, start = 0, 0, 0, time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for customer in range(args.customers):
+            session = model.new_session(f"c{customer}")
+            utterances = [rng.choice(rng.choice(list(FAQ.values()))), rng.choice(PRIVATE)]
+            if rng.random() < 0.25:
+                utterances.insert(0, rng.choice(PREFERENCES))
+            for turn, utterance in enumerate(utterances):
+                hits = model.response_cache.hits
+                reply = model.get_response(utterance, session)
+                hit = model.response_cache.hits > hits
+                if utterance in group_of and turn == 0:
+                    faq_turns += 1
+                    asked = reply.split("'")[1]
+                    wrong += hit and group_of.get(asked) != group_of[utterance]
+                else:
+                    private_hits += hit
+    elapsed = time.perf_counter() - start
+
+    cache = model.response_cache.stats()
+    print(json.dumps({
+        "customers": args.customers,
+        "first_turn_faqs": faq_turns,
+        "faq_hit_rate": round(cache["hits"] / faq_turns, 3),
+        "wrong_hits": int(wrong),
+        "private_hits": int(private_hits),  # Includes FAQs asked after a preference
+        "agent_turns": model.agent_turns,
+        "saved_seconds": cache["saved_seconds"],
+        "saved_ms_per_hit": cache["saved_ms_per_hit"],
+        "elapsed_s": round(elapsed, 2),
+        "elapsed_without_cache_s": round(elapsed + cache["saved_seconds"], 2),
+        "threshold": model.response_cache.threshold,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Cold-start time of the app: importing it, serving the first page, handling the
+first voice turn, and the background warm-up (menu restore and agent build),
+plus a second turn once warm-up has finished.
+
+Each run is a fresh interpreter in an empty working directory, so nothing is
+cached. OpenAI and Cartesia are the local stand-ins from benchmarks.loadtest,
+answering without added latency, so the first turn is a real pipelined
+dialogue turn (agent, tool call and TTS) and its time is the app's own. The
+first turn arrives straight after the import, so it waits for the agent build.
+
+Exits with status 1 if the median import, first-request or warm-turn time
+misses its target, so the numbers can be tracked between versions.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--max-import-ms 1500] [--max-first-request-ms 4000]
+                                          [--max-warm-turn-ms 500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.loadtest.fakes import serve_cartesia, serve_openai
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/')
+first_page = time.perf_counter()
+def turn(text):
+    response = client.post('/voice-interaction', json={"user_input": text, "pipeline": True})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines and lines[-1].get("done"), lines
+turn("How much is a latte?")
+first_turn = time.perf_counter()
+while app.warm_up_job.status not in ('done', 'failed', 'cancelled'):
+    time.sleep(0.005)
+warm = time.perf_counter()
+turn("Does the muffin have nuts?")
+warm_turn = time.perf_counter()
+ms = lambda t: round(1000 * (t - start), 1)
+print(json.dumps({"import_ms": ms(imported), "first_page_ms": ms(first_page), "first_turn_ms": ms(first_turn),
+                  "warm_up_ms": ms(warm), "warm_turn_ms": round(1000 * (warm_turn - warm), 1),
+                  "warm_up_status": app.warm_up_job.status}))
+"""
+
+
+def run_once(openai, cartesia):
+    env = dict(os.environ, PYTHONPATH=ROOT, OPENAI_API_KEY="unused", CARTESIA_API_KEY="unused",
+               OPENAI_BASE_URL=f"{openai.url}/v1", CARTESIA_BASE_URL=cartesia.url)
+    env.pop("OPENAI_API_BASE", None)
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run([sys.executable, "-c", CHILD], cwd=cwd, env=env,
+                                capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=1500)
+    parser.add_argument("--max-first-request-ms", type=float, default=4000,
+                        help="Target for the first voice turn, measured from the end of the import")
+    parser.add_argument("--max-warm-turn-ms", type=float, default=500,
+                        help="Target for a voice turn once warm-up has finished")
+    args = parser.parse_args()
+
+    openai = serve_openai(first_token_ms=0, token_ms=0)
+    cartesia = serve_cartesia(first_chunk_ms=0, realtime_factor=1000.0)
+    try:
+        runs = [run_once(openai, cartesia) for _ in range(args.runs)]
+    finally:
+        openai.shutdown()
+        cartesia.shutdown()
+    median = lambda key: round(statistics.median(run[key] for run in runs), 1)
+    results = {key: median(key) for key in ("import_ms", "first_page_ms", "first_turn_ms", "warm_up_ms", "warm_turn_ms")}
+    results["first_request_ms"] = round(results["first_turn_ms"] - results["import_ms"], 1)
+    results["runs"] = args.runs
+    results["targets"] = {"import_ms": args.max_import_ms, "first_request_ms": args.max_first_request_ms,
+                          "warm_turn_ms": args.max_warm_turn_ms}
+    results["met"] = all(results[key] <= target for key, target in results["targets"].items())
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["met"] else 1)
+
+
+if __name__ == "__main__":
+    main()
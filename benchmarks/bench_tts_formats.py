@@ -0,0 +1,106 @@
+"""
+Microbenchmark for the TTS conversion/encoding path.
+
+Feeds synthetic float32 PCM through the legacy BytesIO/numpy/pydub pipeline
+and through PCMBuffer + encode_audio for each output format, and reports CPU
+time (including ffmpeg subprocesses) and peak Python memory per second of
+audio.
+
+Usage: python -m benchmarks.bench_tts_formats [--seconds 5] [--chunk-bytes 4096]
+"""
+import argparse
+import io
+import json
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from models.audio import AUDIO_FORMATS, SAMPLE_RATE, PCMBuffer, encode_audio
+
+
+def synthetic_chunks(seconds, chunk_bytes):
+    """Sine sweep split into SSE-sized chunks (deliberately not sample aligned)."""
+    t = np.arange(int(seconds * SAMPLE_RATE), dtype=np.float32) / SAMPLE_RATE
+    audio = (0.8 * np.sin(2 * np.pi * (220 + 200 * t) * t)).astype(np.float32).tobytes()
+    return [audio[i:i + chunk_bytes] for i in range(0, len(audio), chunk_bytes)]
+
+
+def legacy_mp3(chunks):
+    """The original text_to_speech conversion path."""
+    from pydub import AudioSegment
+
+    audio_buffer = io.BytesIO()
+    for chunk in chunks:
+        audio_buffer.write(chunk)
+    audio_buffer.seek(0)
+    raw_audio_data = np.frombuffer(audio_buffer.read(), dtype=np.float32)
+    int_audio_data = np.int16(raw_audio_data * 32767)
+    pcm_16bit_buffer = io.BytesIO()
+    pcm_16bit_buffer.write(int_audio_data.tobytes())
+    pcm_16bit_buffer.seek(0)
+    segment = AudioSegment.from_raw(pcm_16bit_buffer, frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+    out = io.BytesIO()
+    segment.export(out, format="mp3")
+    return out.getvalue()
+
+
+def pipeline(audio_format):
+    def run(chunks):
+        pcm = PCMBuffer()
+        for chunk in chunks:
+            pcm.write(chunk)
+        return encode_audio(pcm, audio_format)
+    return run
+
+
+def cpu_seconds():
+    """CPU time of this process plus its finished children (ffmpeg encodes mp3 and opus)."""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def measure(run, chunks, seconds, repeats):
+    tracemalloc.start()
+    try:
+        cpu_start = cpu_seconds()
+        wall_start = time.perf_counter()
+        for _ in range(repeats):
+            encoded = None
+            encoded = run(chunks)
+        cpu = (cpu_seconds() - cpu_start) / repeats
+        wall = (time.perf_counter() - wall_start) / repeats
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "cpu_ms_per_audio_second": round(cpu * 1000 / seconds, 3),
+        "wall_ms_per_audio_second": round(wall * 1000 / seconds, 3),
+        "peak_kib_per_audio_second": round(peak / 1024 / seconds, 1),
+        "bytes_per_audio_second": int(len(encoded) / seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--chunk-bytes", type=int, default=4096)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.seconds, args.chunk_bytes)
+    candidates = {"legacy-mp3": legacy_mp3}
+    candidates.update({name: pipeline(name) for name in AUDIO_FORMATS})
+
+    results = {}
+    for name, run in candidates.items():
+        try:
+            results[name] = measure(run, chunks, args.seconds, args.repeats)
+        except Exception as e:  # mp3/opus need ffmpeg on PATH
+            results[name] = {"error": str(e)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
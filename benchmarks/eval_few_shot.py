@@ -0,0 +1,136 @@
+"""
+Offline evaluation of dynamic few-shot selection.
+
+For a fixed set of customer utterances with the expected tool, compares the
+old prompt (every example in the system prompt) with the static system
+prompt plus the k selected examples:
+
+- system prompt tokens per turn;
+- coverage: the share of utterances whose selected examples include one for
+  the expected tool, which is always 1.0 when every example is sent;
+- nearest-example accuracy: whether the tool of the closest example is the
+  expected one.
+
+With --live (needs OPENAI_API_KEY) both prompts are also sent to gpt-4o with
+the agent's tools bound, and the accuracy of the tool it calls is reported.
+
+Usage: python -m benchmarks.eval_few_shot [--k 4] [--live]
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from models.dialogue_model import SYS_PROMPT
+from models.memory import count_tokens
+from models.prompt_examples import EXAMPLES, ExampleSelector, render_examples
+
+# (utterance, expected tool or None for a plain reply)
+UTTERANCES = [
+    ("How much is a cappuccino?", "MenuPriceAllergenBasic"),
+    ("What does the iced coffee cost?", "MenuPriceAllergenBasic"),
+    ("What's the price of a blueberry muffin?", "MenuPriceAllergenBasic"),
+    ("How much for a large mocha?", "MenuPriceAllergenBasic"),
+    ("Does the latte have dairy?", "MenuPriceAllergenBasic"),
+    ("Is the croissant gluten-free?", "MenuPriceAllergenBasic"),
+    ("Are there nuts in the granola?", "MenuPriceAllergenBasic"),
+    ("Does the sandwich have eggs in it?", "MenuPriceAllergenBasic"),
+    ("I'm allergic to dairy. Is the soup safe for me?", "MenuPriceAllergenBasic"),
+    ("Is the salad vegan?", "MenuPriceAllergenBasic"),
+    ("What sizes does the cappuccino come in?", "MenuPriceAllergenBasic"),
+    ("How long will the sandwich take?", "MenuPriceAllergenBasic"),
+    ("What's in the Caesar salad?", "MenuDescription"),
+    ("What's in the chai latte?", "MenuDescription"),
+    ("Can you describe the avocado toast?", "MenuDescription"),
+    ("Does the cold brew have caffeine?", "MenuDescription"),
+    ("Tell me about the breakfast burrito.", "MenuDescription"),
+    ("Can I get a latte?", "AddToCart"),
+    ("Can I get two blueberry muffins?", "AddToCart"),
+    ("Can I get a turkey sandwich please?", "AddToCart"),
+    ("Can I get an iced coffee?", "AddToCart"),
+    ("Can you make the latte with oat milk?", "UpdateCartItem"),
+    ("Can I get extra whipped cream on my mocha?", "UpdateCartItem"),
+    ("Can you make the burrito without cheese?", "UpdateCartItem"),
+    ("Can I swap the fries for a salad?", "UpdateCartItem"),
+    ("Actually, take off the latte.", "RemoveFromCart"),
+    ("Take off the cookie please.", "RemoveFromCart"),
+    ("It's for Maria.", "SetCustomerName"),
+    ("The order is for Alex.", "SetCustomerName"),
+    ("What's my total?", "ViewCart"),
+    ("What's my total so far?", "ViewCart"),
+    ("Do you have almond milk?", None),
+    ("Can I pay with card?", None),
+    ("Do you have coconut milk?", None),
+    ("Can I make it to-go?", None),
+]
+
+
+def expected_tool_covered(examples, tool):
+    return any(example.get("tool") == tool for example in examples)
+
+
+def offline(selector, k):
+    full_prompt = SYS_PROMPT + render_examples(EXAMPLES)
+    full_tokens = count_tokens(full_prompt)
+    static_tokens = count_tokens(SYS_PROMPT)
+    selected_tokens, covered, nearest = [], 0, 0
+    for utterance, tool in UTTERANCES:
+        examples = selector.select(utterance, k)
+        selected_tokens.append(static_tokens + count_tokens(render_examples(examples)))
+        covered += expected_tool_covered(examples, tool)
+        nearest += examples[0].get("tool") == tool
+    avg_selected = sum(selected_tokens) / len(selected_tokens)
+    return {
+        "utterances": len(UTTERANCES),
+        "k": k,
+        "full_prompt_tokens": full_tokens,
+        "selected_prompt_tokens_avg": round(avg_selected, 1),
+        "token_reduction": round(1 - avg_selected / full_tokens, 3),
+        "coverage": round(covered / len(UTTERANCES), 3),
+        "nearest_example_accuracy": round(nearest / len(UTTERANCES), 3),
+    }
+
+
+def live(selector, k):
+    """Tool-choice accuracy of gpt-4o with the full and the selected prompt."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from langchain_openai import ChatOpenAI
+    from models.dialogue_model import DialogueModel
+
+    model = DialogueModel(pd.DataFrame())
+    model.ensure_agent()
+    llm = ChatOpenAI(temperature=0, model_name="gpt-4o").bind_tools(model.tools)
+
+    def chosen_tool(messages):
+        calls = llm.invoke(messages).tool_calls
+        return calls[0]["name"] if calls else None
+
+    correct = {"full": 0, "selected": 0}
+    for utterance, tool in UTTERANCES:
+        full = [SystemMessage(content=SYS_PROMPT + render_examples(EXAMPLES)), HumanMessage(content=utterance)]
+        selected = [SystemMessage(content=SYS_PROMPT), SystemMessage(content=selector.render(utterance, k)),
+                    HumanMessage(content=utterance)]
+        correct["full"] += chosen_tool(full) == tool
+        correct["selected"] += chosen_tool(selected) == tool
+    return {f"{name}_tool_accuracy": round(n / len(UTTERANCES), 3) for name, n in correct.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=None, help="Examples per turn (default FEW_SHOT_K)")
+    parser.add_argument("--live", action="store_true", help="Also measure gpt-4o tool choice")
+    args = parser.parse_args()
+
+    selector = ExampleSelector()
+    k = args.k or selector.k
+    results = offline(selector, k)
+    if args.live:
+        if not os.getenv("OPENAI_API_KEY"):
+            parser.error("--live needs OPENAI_API_KEY")
+        results.update(live(selector, k))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
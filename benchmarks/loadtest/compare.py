@@ -0,0 +1,82 @@
+"""
+Compare two load-test reports from benchmarks.loadtest.run, level by level and
+endpoint by endpoint.
+
+Prints throughput and latency percentiles of the baseline and the candidate
+with the relative change. Exits with status 1 if any endpoint's p95 latency
+grew by more than --max-regression, or it gained errors, so the comparison
+can gate a change.
+
+Usage: python -m benchmarks.loadtest.compare baseline.json candidate.json [--max-regression 0.10]
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {level["concurrency"]: level for level in report["levels"]}
+
+
+def change(old, new):
+    if not old:
+        return None
+    return (new - old) / old
+
+
+def compare(baseline, candidate, max_regression):
+    rows, regressions = [], []
+    for concurrency in sorted(set(baseline) & set(candidate)):
+        old_endpoints = baseline[concurrency]["endpoints"]
+        new_endpoints = candidate[concurrency]["endpoints"]
+        for endpoint in sorted(set(old_endpoints) & set(new_endpoints)):
+            old, new = old_endpoints[endpoint], new_endpoints[endpoint]
+            row = {"concurrency": concurrency, "endpoint": endpoint, "errors": [old["errors"], new["errors"]]}
+            for metric in METRICS:
+                row[metric] = [old[metric], new[metric], change(old[metric], new[metric])]
+            rows.append(row)
+            p95_change = row["p95_ms"][2]
+            if (p95_change is not None and p95_change > max_regression) or new["errors"] > old["errors"]:
+                regressions.append(f"{endpoint} at {concurrency}")
+    return rows, regressions
+
+
+def format_change(value):
+    return "" if value is None else f"{value:+.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Allowed relative p95 increase")
+    parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    args = parser.parse_args()
+
+    old_report, baseline = load(args.baseline)
+    new_report, candidate = load(args.candidate)
+    rows, regressions = compare(baseline, candidate, args.max_regression)
+
+    if args.json:
+        print(json.dumps({"baseline": old_report["revision"], "candidate": new_report["revision"],
+                          "rows": rows, "regressions": regressions}, indent=2))
+    else:
+        print(f"{old_report['revision']} -> {new_report['revision']}")
+        header = f"{'conc':>4}  {'endpoint':<32}" + "".join(f"{metric:>22}" for metric in METRICS) + f"{'errors':>10}"
+        print(header)
+        for row in rows:
+            cells = "".join(
+                f"{row[metric][0]:>8g} {row[metric][1]:>8g} {format_change(row[metric][2]):>4}" for metric in METRICS
+            )
+            print(f"{row['concurrency']:>4}  {row['endpoint']:<32}{cells}{row['errors'][0]:>5}{row['errors'][1]:>5}")
+        if regressions:
+            print("Regressions: " + ", ".join(regressions))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
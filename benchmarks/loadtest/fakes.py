@@ -0,0 +1,263 @@
+"""
+Local stand-ins for the OpenAI and Cartesia APIs, for load testing.
+
+FakeOpenAI serves /v1/chat/completions, streamed and not streamed. For agent
+turns it picks a cashier tool from keywords in the customer's message, in
+the OpenAI tool-calling format, and answers in plain text once the tool
+result comes back. For menu extraction prompts it parses "Item ... $price"
+lines into the JSON the extraction chain expects.
+
+FakeCartesia serves /tts/sse with float32 PCM chunks, sized to the transcript,
+and /voices/<id> for the voice embedding.
+
+Latencies are configurable so the app can be measured against realistic or
+exaggerated vendor behaviour.
+
+Usage: python -m benchmarks.loadtest.fakes [--openai-port 8601] [--cartesia-port 8602]
+"""
+import argparse
+import base64
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+PRICE_LINE = re.compile(r"^\s*(?P<item>[A-Za-z][A-Za-z '&-]+?)\s*[.\-–: ]*\$?(?P<price>\d+\.\d{2})\s*$")
+ITEM_AFTER = re.compile(r"(?:get|have|like|add|want|is|are|in|about|off|remove)\s+(?:a |an |the |two |some )?(?P<item>[a-z][a-z ]+?)(?: with| please|\?|\.|,|$)")
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def send_event(self, data, event=None):
+        prefix = f"event: {event}\n" if event else ""
+        self.wfile.write(f"{prefix}data: {data}\n\n".encode())
+        self.wfile.flush()
+
+
+# OpenAI
+
+def choose_tool(text, tools):
+    """The cashier tool a customer message calls for, as (name, arguments), or None."""
+    text = text.lower()
+    match = ITEM_AFTER.search(text)
+    item = match.group("item").strip() if match else text.strip(" ?.!")
+    if "total" in text or "my order" in text:
+        choice = ("ViewCart", {})
+    elif re.search(r"how much|price|cost|allerg|contain|gluten|dairy|nuts", text):
+        choice = ("MenuPriceAllergenBasic", {"item_name": item})
+    elif re.search(r"what's in|what is in|describe|tell me about", text):
+        choice = ("MenuDescription", {"item_name": item})
+    elif re.search(r"take off|remove|drop", text):
+        choice = ("RemoveFromCart", {"item": item})
+    elif match := re.search(r"(?:name is|it's for|for) ([A-Z]?[a-z]+)\W*$", text):
+        choice = ("SetCustomerName", {"name": match.group(1).title()})
+    elif re.search(r"can i get|i'd like|i'll have|i will have|add|get me", text):
+        size = next((s for s in ("small", "medium", "large") if s in text), "")
+        customizations = [m for m in ("oat milk", "almond milk", "extra shot", "no ice") if m in text]
+        if size:
+            item = item.replace(size, "").strip()
+        choice = ("AddToCart", {"item": item, "quantity": 1, "size": size, "customizations": customizations})
+    else:
+        return None
+    return choice if choice[0] in tools else None
+
+
+def extract_menu_items(prompt):
+    raw = prompt.split("Raw menu text:", 1)[-1].split("Extracted menu information:", 1)[0]
+    items = []
+    for line in raw.splitlines():
+        match = PRICE_LINE.match(line)
+        if match:
+            items.append({"item": match.group("item").strip(), "description": "", "price": f"${match.group('price')}",
+                          "allergens": ""})
+    return "```json\n" + json.dumps({"items": items}) + "\n```"
+
+
+def message_text(message):
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+class OpenAIHandler(Handler):
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self.send_json({"error": {"message": "not found"}}, 404)
+        request = self.read_json()
+        config = self.server.config
+        messages = request.get("messages", [])
+        last = messages[-1] if messages else {"role": "user", "content": ""}
+        tools = {tool["function"]["name"] for tool in request.get("tools", [])}
+        text = message_text(last)
+
+        tool_call, content = None, None
+        if "Extract menu information" in text:
+            content = extract_menu_items(text)
+        elif last.get("role") == "tool":
+            content = "Got it! Anything else I can get for you? Just say the word."
+        else:
+            choice = choose_tool(text, tools)
+            if choice:
+                tool_call = {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                             "function": {"name": choice[0], "arguments": json.dumps(choice[1])}}
+            else:
+                content = "Sure thing! We can do that. Anything else?"
+
+        prompt_tokens = sum(len(message_text(m)) for m in messages) // 4
+        completion_tokens = len(content or "") // 4 + (8 if tool_call else 0)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        with self.server.lock:
+            self.server.requests += 1
+
+        time.sleep(config["first_token_s"])
+        if request.get("stream"):
+            self.stream(request, content, tool_call, usage)
+        else:
+            time.sleep(config["token_s"] * len((content or "").split()))
+            message = {"role": "assistant", "content": content}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            self.send_json({
+                "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion", "created": int(time.time()),
+                "model": request.get("model", "gpt-4o"),
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop"}],
+                "usage": usage,
+            })
+
+    def stream(self, request, content, tool_call, usage):
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": request.get("model", "gpt-4o")}
+
+        def chunk(delta, finish_reason=None):
+            payload = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+            self.send_event(json.dumps(payload))
+
+        self.start_events()
+        chunk({"role": "assistant", "content": ""})
+        if tool_call:
+            chunk({"tool_calls": [dict(tool_call, index=0)]})
+        else:
+            for token in re.findall(r"\S+\s*", content):
+                time.sleep(self.server.config["token_s"])
+                chunk({"content": token})
+        chunk({}, "tool_calls" if tool_call else "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self.send_event(json.dumps(dict(base, choices=[], usage=usage)))
+        self.send_event("[DONE]")
+
+
+# Cartesia
+
+class CartesiaHandler(Handler):
+    def do_GET(self):
+        if self.path.startswith("/voices/"):
+            return self.send_json({"id": self.path.rsplit("/", 1)[-1], "embedding": [0.0] * 192})
+        self.send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        if not self.path.startswith("/tts/sse"):
+            return self.send_json({"error": "not found"}, 404)
+        request = self.read_json()
+        config = self.server.config
+        with self.server.lock:
+            self.server.requests += 1
+
+        # About 60 ms of speech per character, sent in 100 ms chunks
+        seconds = max(0.3, 0.06 * len(request.get("transcript", "")))
+        chunk_samples = SAMPLE_RATE // 10
+        chunk = base64.b64encode(
+            (0.1 * np.sin(np.arange(chunk_samples) * 2 * np.pi * 220 / SAMPLE_RATE)).astype(np.float32).tobytes()
+        ).decode()
+
+        time.sleep(config["first_chunk_s"])
+        self.start_events()
+        for i in range(int(seconds * 10)):
+            if i:
+                time.sleep(0.1 / config["realtime_factor"])
+            self.send_event(json.dumps({"type": "chunk", "data": chunk, "done": False, "status_code": 206}), "chunk")
+        self.send_event(json.dumps({"type": "done", "done": True, "status_code": 200}), "done")
+
+
+def serve(handler, port=0, host="127.0.0.1", **config):
+    server = FakeServer((host, port), handler)
+    server.config = config
+    server.lock = threading.Lock()
+    server.requests = 0
+    return server.start()
+
+
+def serve_openai(port=0, first_token_ms=300, token_ms=20):
+    return serve(OpenAIHandler, port, first_token_s=first_token_ms / 1000, token_s=token_ms / 1000)
+
+
+def serve_cartesia(port=0, first_chunk_ms=150, realtime_factor=10.0):
+    return serve(CartesiaHandler, port, first_chunk_s=first_chunk_ms / 1000, realtime_factor=realtime_factor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--openai-port", type=int, default=8601)
+    parser.add_argument("--cartesia-port", type=int, default=8602)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300)
+    parser.add_argument("--llm-token-ms", type=float, default=20)
+    parser.add_argument("--tts-first-chunk-ms", type=float, default=150)
+    parser.add_argument("--tts-realtime-factor", type=float, default=10.0)
+    args = parser.parse_args()
+
+    openai = serve_openai(args.openai_port, args.llm_first_token_ms, args.llm_token_ms)
+    cartesia = serve_cartesia(args.cartesia_port, args.tts_first_chunk_ms, args.tts_realtime_factor)
+    print(f"OPENAI_BASE_URL={openai.url}/v1")
+    print(f"CARTESIA_BASE_URL={cartesia.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+End-to-end load test of the app against local OpenAI and Cartesia stand-ins
+(see fakes.py), so throughput can be measured without vendor keys or costs.
+
+The app runs as a real server in a fresh working directory. At each
+concurrency level, that many virtual customers each hold scripted
+conversations, in their own session, for --duration seconds:
+
+- a price question (fast path), two items added to the cart and "What's my
+  total?" through /voice-interaction, fetching the audio of every reply;
+- /place-order, then /order-summary as the dashboard would poll it.
+
+Meanwhile an uploader posts a new menu to /upload-menu every
+--upload-interval seconds and polls the job until the menu is live.
+
+The report is JSON: per level and endpoint, request count, errors, requests
+per second and latency percentiles in milliseconds, plus the git revision, so
+two runs can be diffed with benchmarks.loadtest.compare.
+
+Usage: python -m benchmarks.loadtest.run [--levels 1,4,16,32] [--duration 20] [--out report.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+from benchmarks.loadtest.fakes import serve_cartesia, serve_openai
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Audio is written under the working directory's static/, so serve static
+# files from there rather than from the repository
+CHILD = """
+import os, sys
+import app
+app.app.static_folder = os.path.abspath('static')
+app.socketio.run(app.app, host='127.0.0.1', port=int(sys.argv[1]), allow_unsafe_werkzeug=True)
+"""
+
+MENU = """Cafe Menu
+Latte $4.50
+Cappuccino $4.25
+Mocha $4.75
+Iced Coffee $3.75
+Chai Latte $4.50
+Blueberry Muffin $3.25
+Butter Croissant $3.50
+Turkey Sandwich $8.95
+"""
+
+CONVERSATION = [
+    "How much is a latte?",
+    "Can I get a large latte with oat milk?",
+    "Can I also get a blueberry muffin?",
+    "What's my total?",
+]
+
+
+class Recorder:
+    """Latencies and errors per endpoint for one concurrency level."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, seconds, ok=True):
+        with self.lock:
+            if ok:
+                self.latencies[endpoint].append(seconds)
+            else:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            ms = 1000 * np.array(self.latencies[endpoint] or [np.nan])
+            count = len(self.latencies[endpoint])
+            endpoints[endpoint] = {
+                "count": count,
+                "errors": self.errors[endpoint],
+                "rps": round(count / elapsed, 2),
+                "mean_ms": round(float(np.mean(ms)), 1),
+                "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                "p95_ms": round(float(np.percentile(ms, 95)), 1),
+                "p99_ms": round(float(np.percentile(ms, 99)), 1),
+            }
+        return endpoints
+
+
+class Client:
+    """One virtual customer: its own HTTP connection pool and session id."""
+
+    def __init__(self, base_url, recorder, mode):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.mode = mode
+        self.http = requests.Session()
+        self.session_id = uuid.uuid4().hex
+
+    def timed(self, endpoint, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=120, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.record(endpoint, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    def fetch_audio(self, url):
+        self.timed("audio", "GET", url)
+
+    def say(self, text):
+        headers = {"X-Session-Id": self.session_id}
+        if self.mode != "pipeline":
+            response = self.timed("voice-interaction", "POST", "/voice-interaction", headers=headers,
+                                  json={"user_input": text, "stream": self.mode == "stream"})
+            if response is not None:
+                self.timed("speech" if self.mode == "stream" else "audio", "GET", response.json()["audio_url"])
+            return
+
+        # Pipelined replies arrive as NDJSON lines, one per spoken segment
+        start = time.perf_counter()
+        ok, first, audio_urls = True, None, []
+        try:
+            with self.http.post(self.base_url + "/voice-interaction", headers=headers, stream=True, timeout=120,
+                                json={"user_input": text, "pipeline": True}) as response:
+                ok = response.status_code < 400
+                for line in response.iter_lines() if ok else ():
+                    event = json.loads(line)
+                    if "error" in event:
+                        ok = False
+                    elif "audio_url" in event:
+                        first = first or time.perf_counter() - start
+                        audio_urls.append(event["audio_url"])
+        except (requests.RequestException, ValueError):
+            ok = False
+        self.recorder.record("voice-interaction", time.perf_counter() - start, ok)
+        if ok and first is not None:
+            self.recorder.record("voice-interaction (first audio)", first)
+        for url in audio_urls:
+            self.fetch_audio(url)
+
+    def converse(self):
+        for text in CONVERSATION:
+            self.say(text)
+        self.timed("place-order", "POST", "/place-order", headers={"X-Session-Id": self.session_id})
+        self.timed("order-summary", "GET", "/order-summary", params={"limit": 100})
+        self.session_id = uuid.uuid4().hex
+
+
+def upload_menu(http, base_url, recorder, text, filename="menu.txt"):
+    """Upload a menu and wait for it to go live; records the POST and the whole job."""
+    start = time.perf_counter()
+    try:
+        response = http.post(base_url + "/upload-menu", files={"menu": (filename, text.encode())}, timeout=60)
+        recorder.record("upload-menu", time.perf_counter() - start, response.status_code == 202)
+        if response.status_code != 202:
+            return None
+        status_url = response.json()["status_url"]
+        while True:
+            job = http.get(base_url + status_url, timeout=60).json()
+            if job["status"] in ("done", "failed", "cancelled"):
+                break
+            time.sleep(0.05)
+    except (requests.RequestException, ValueError):
+        recorder.record("upload-menu (job)", time.perf_counter() - start, False)
+        return None
+    recorder.record("upload-menu (job)", time.perf_counter() - start, job["status"] == "done")
+    return job
+
+
+def run_level(base_url, concurrency, duration, mode, upload_interval):
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+    conversations = [0] * concurrency
+
+    def customer(i):
+        client = Client(base_url, recorder, mode)
+        while time.perf_counter() < deadline:
+            client.converse()
+            conversations[i] += 1
+
+    def uploader():
+        http = requests.Session()
+        while time.perf_counter() < deadline:
+            # A new special each time, so the menu cache never short-circuits the upload
+            special = f"Special {uuid.uuid4().hex[:6]} ${np.random.randint(3, 12)}.{np.random.randint(0, 99):02d}\n"
+            upload_menu(http, base_url, recorder, MENU + special)
+            time.sleep(upload_interval)
+
+    threads = [threading.Thread(target=customer, args=(i,)) for i in range(concurrency)]
+    if upload_interval > 0:
+        threads.append(threading.Thread(target=uploader))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "conversations": sum(conversations),
+        "conversations_per_s": round(sum(conversations) / elapsed, 2),
+        "endpoints": recorder.summary(elapsed),
+    }
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+    return revision
+
+
+def wait_until_ready(base_url, process, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The app exited during startup")
+        try:
+            warm_up = requests.get(base_url + "/stats", timeout=5).json()["warm_up"]
+            if warm_up["status"] == "done":
+                return
+            if warm_up["status"] in ("failed", "cancelled"):
+                raise RuntimeError(f"Warm-up {warm_up['status']}: {warm_up.get('error')}")
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("The app did not become ready in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,4,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per level")
+    parser.add_argument("--mode", choices=("pipeline", "stream", "file"), default="pipeline",
+                        help="How /voice-interaction is asked to deliver audio")
+    parser.add_argument("--audio-format", choices=("wav", "pcm", "mp3", "opus"),
+                        help="Override TTS_AUDIO_FORMAT for the file and stream modes (mp3 and opus need ffmpeg); "
+                             "by default the app's own formats are measured")
+    parser.add_argument("--upload-interval", type=float, default=5, help="Seconds between menu uploads; 0 disables them")
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300)
+    parser.add_argument("--llm-token-ms", type=float, default=20)
+    parser.add_argument("--tts-first-chunk-ms", type=float, default=150)
+    parser.add_argument("--tts-realtime-factor", type=float, default=10.0,
+                        help="How much faster than real time the fake TTS streams audio")
+    parser.add_argument("--out", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+
+    openai = serve_openai(first_token_ms=args.llm_first_token_ms, token_ms=args.llm_token_ms)
+    cartesia = serve_cartesia(first_chunk_ms=args.tts_first_chunk_ms, realtime_factor=args.tts_realtime_factor)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    env = dict(os.environ, PYTHONPATH=ROOT, OPENAI_API_KEY="loadtest", CARTESIA_API_KEY="loadtest",
+               OPENAI_BASE_URL=f"{openai.url}/v1", CARTESIA_BASE_URL=cartesia.url)
+    env.pop("OPENAI_API_BASE", None)
+    if args.audio_format:
+        env["TTS_AUDIO_FORMAT"] = args.audio_format
+    with tempfile.TemporaryDirectory() as cwd:
+        log_path = os.path.join(cwd, "app.log")
+        with open(log_path, "w") as log:
+            process = subprocess.Popen([sys.executable, "-c", CHILD, str(args.port)], cwd=cwd, env=env,
+                                       stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_until_ready(base_url, process)
+            job = upload_menu(requests.Session(), base_url, Recorder(), MENU)
+            if not job or job["status"] != "done":
+                raise RuntimeError(f"Initial menu upload failed: {job}")
+
+            results = []
+            for concurrency in levels:
+                print(f"Running {concurrency} concurrent customers for {args.duration:g}s", file=sys.stderr)
+                results.append(run_level(base_url, concurrency, args.duration, args.mode, args.upload_interval))
+            app_stats = requests.get(base_url + "/stats", timeout=10).json()
+        except Exception:
+            with open(log_path) as log:
+                sys.stderr.write(log.read()[-4000:])
+            raise
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "levels": results,
+        "vendor_requests": {"openai": openai.requests, "cartesia": cartesia.requests},
+        "app_stats": {"dialogue": app_stats.get("dialogue"), "tts_cache": app_stats.get("tts_cache")},
+    }
+    openai.shutdown()
+    cartesia.shutdown()
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import bisect
+import heapq
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from models.menu_index import normalize
+
+HOUR = 3600
+DAY = 24 * HOUR
+# Rollups keep this many of the most recent buckets
+MAX_HOURLY_BUCKETS = int(os.getenv("ANALYTICS_HOURLY_BUCKETS", 24 * 31))
+MAX_DAILY_BUCKETS = int(os.getenv("ANALYTICS_DAILY_BUCKETS", 2 * 366))
+BUCKET_SIZES = {"hour": HOUR, "day": DAY}
+# Distinct customizations kept; past twice this, only the most common survive
+MAX_CUSTOMIZATIONS = int(os.getenv("ANALYTICS_MAX_CUSTOMIZATIONS", 1000))
+
+# "2 x Caesar Salad (large)" in the comma-joined `items` of orders without `lines`
+LEGACY_ITEM = re.compile(r"^\s*(?:(\d+)\s*x\s+)?(.+?)(?:\s*\(([^)]*)\))?\s*$")
+LEGACY_CUSTOMIZATION = re.compile(r",\s*(?=[^,:]+:)")
+
+
+def parse_legacy_lines(items, customizations, price_per_item):
+    """
+    Rebuild order lines from the comma-joined strings of older orders. Line
+    totals are estimated from the average price per item.
+    """
+    extras = {}
+    for part in LEGACY_CUSTOMIZATION.split(customizations or ""):
+        name, _, values = part.partition(":")
+        if values:
+            extras[name.strip()] = [value.strip() for value in values.split(",") if value.strip()]
+    lines = []
+    for part in (items or "").split(","):
+        match = LEGACY_ITEM.match(part)
+        if not match or not match.group(2).strip():
+            continue
+        quantity = int(match.group(1) or 1)
+        item = match.group(2).strip()
+        lines.append({"item": item, "quantity": quantity, "size": match.group(3) or "",
+                      "customizations": extras.get(item, []),
+                      "line_total": round(quantity * (price_per_item or 0.0), 2)})
+    return lines
+
+
+class Totals:
+    """
+    Running sums behind the analytics: overall, per item, per customization,
+    per size and per time bucket. Bucket starts are kept sorted as they are
+    added, so reports slice the most recent ones without sorting.
+    """
+
+    def __init__(self):
+        self.orders = 0
+        self.revenue = 0.0
+        self.items_sold = 0
+        self.item_stats = {}  # item -> [quantity, revenue, orders]
+        self.customizations = Counter()
+        self.sizes = Counter()
+        self.buckets = {"hour": {}, "day": {}}  # bucket start -> [orders, revenue, items]
+        self.bucket_starts = {"hour": [], "day": []}  # ascending
+
+    def add_bucket(self, size, start, orders, revenue, items):
+        buckets = self.buckets[size]
+        bucket = buckets.get(start)
+        if bucket is None:
+            bucket = buckets[start] = [0, 0.0, 0]
+            starts = self.bucket_starts[size]
+            if not starts or start > starts[-1]:
+                starts.append(start)
+            else:
+                bisect.insort(starts, start)  # A late or backfilled order
+            limit = MAX_HOURLY_BUCKETS if size == "hour" else MAX_DAILY_BUCKETS
+            if len(starts) > limit:
+                del buckets[starts.pop(0)]
+        bucket[0] += orders
+        bucket[1] += revenue
+        bucket[2] += items
+
+    def add_customizations(self, counts):
+        self.customizations.update(counts)
+        if len(self.customizations) > 2 * MAX_CUSTOMIZATIONS:
+            # Free-text customizations have a long tail; keep the head
+            self.customizations = Counter(dict(self.customizations.most_common(MAX_CUSTOMIZATIONS)))
+
+    def add_item(self, item, quantity, revenue, orders):
+        stats = self.item_stats.setdefault(item, [0, 0.0, 0])
+        stats[0] += quantity
+        stats[1] += revenue
+        stats[2] += orders
+
+
+class SalesAnalytics:
+    """
+    Sales aggregates kept up to date as orders are placed, so reports never
+    rescan the order history.
+
+    `record` folds one order in, in O(lines). `rebuild` recomputes everything
+    from the order store with vectorized pandas group-bys, a chunk at a time.
+    Orders placed while it runs are applied on top. Item names are resolved
+    against the current menu by exact or alias lookup, so "caesar salads" and
+    "Caesar Salad" count as one item. Reports never read the order history:
+    their cost depends on the number of distinct items and customizations
+    (the latter capped at MAX_CUSTOMIZATIONS, so rare ones are approximate)
+    and on how many buckets are asked for, not on the number of orders.
+    """
+
+    def __init__(self, menu_index=None):
+        self.menu_index = menu_index  # Returns the current MenuIndex
+        self._lock = threading.Lock()
+        self._totals = Totals()
+        self._names = {}
+        self._names_index = None
+        self._rebuilding = False
+        self._pending = []
+        self.last_order_id = 0
+        self.rebuilt_at = None
+
+    def canonical_item(self, name):
+        """
+        The menu's name for an ordered item, or the name as given if the menu doesn't have it.
+        """
+        name = str(name).strip()
+        index = self.menu_index() if self.menu_index else None
+        if index is not self._names_index:
+            self._names, self._names_index = {}, index
+        canonical = self._names.get(name)
+        if canonical is None:
+            match = None if index is None or index.empty else index.lookup(name)
+            canonical = self._names[name] = index.items[match]["item"] if match is not None else name
+        return canonical
+
+    def record(self, order):
+        """
+        Add a placed order (a record from OrderStore.append).
+        """
+        with self._lock:
+            if self._rebuilding:
+                self._pending.append(order)
+                return
+            self._apply(order)
+
+    def _apply(self, order):
+        lines = order.get("lines") or parse_legacy_lines(
+            order.get("items"), order.get("customizations"), order.get("price_per_item"))
+        totals = self._totals
+        quantity = 0
+        seen = set()
+        for line in lines:
+            item = self.canonical_item(line["item"])
+            totals.add_item(item, line["quantity"], line["line_total"], int(item not in seen))
+            seen.add(item)
+            totals.add_customizations(filter(None, map(normalize, line.get("customizations") or [])))
+            if line.get("size"):
+                totals.sizes[normalize(line["size"])] += line["quantity"]
+            quantity += line["quantity"]
+        totals.orders += 1
+        totals.revenue += order["order_total"]
+        totals.items_sold += quantity
+        for size, seconds in BUCKET_SIZES.items():
+            totals.add_bucket(size, int(order["created_at"] // seconds * seconds), 1, order["order_total"], quantity)
+        self.last_order_id = max(self.last_order_id, order.get("id") or 0)
+
+    def rebuild(self, order_store, chunk_size=50000):
+        """
+        Recompute every aggregate from the order history.
+        """
+        import pandas as pd
+
+        with self._lock:
+            self._rebuilding = True
+            self._pending = []
+        try:
+            through = order_store.last_id()
+            totals = Totals()
+            for orders in order_store.frames(through, chunk_size):
+                self._add_frame(totals, orders, pd)
+        except BaseException:
+            with self._lock:
+                pending, self._pending, self._rebuilding = self._pending, [], False
+                for order in pending:
+                    self._apply(order)
+            raise
+
+        with self._lock:
+            self._totals = totals
+            self.last_order_id = through
+            for order in self._pending:
+                if order["id"] > through:
+                    self._apply(order)
+            self._pending = []
+            self._rebuilding = False
+            self.rebuilt_at = time.time()
+        return through
+
+    def _add_frame(self, totals, orders, pd):
+        parsed = orders["lines"].map(json.loads)
+        for row in orders[parsed.map(len) == 0].itertuples():
+            parsed.at[row.Index] = parse_legacy_lines(row.items, row.customizations, row.price_per_item)
+        exploded = parsed.explode().dropna()
+        lines = pd.DataFrame(exploded.tolist(), index=exploded.index,
+                             columns=["item", "quantity", "size", "customizations", "line_total"])
+        lines["order_id"] = orders["id"].loc[lines.index].to_numpy()
+
+        # Resolve each distinct name once
+        names = {name: self.canonical_item(name) for name in lines["item"].unique()}
+        lines["item"] = lines["item"].map(names)
+        per_item = lines.groupby("item").agg(quantity=("quantity", "sum"), revenue=("line_total", "sum"),
+                                             orders=("order_id", "nunique"))
+        for item, row in per_item.iterrows():
+            totals.add_item(item, int(row.quantity), float(row.revenue), int(row.orders))
+
+        customizations = lines["customizations"].explode().dropna().map(normalize)
+        totals.add_customizations(customizations[customizations != ""].value_counts().to_dict())
+        sized = lines[lines["size"].fillna("") != ""]
+        totals.sizes.update(sized.groupby(sized["size"].map(normalize))["quantity"].sum().astype(int).to_dict())
+
+        quantity = lines.groupby(lines.index)["quantity"].sum().reindex(orders.index, fill_value=0)
+        totals.orders += len(orders)
+        totals.revenue += float(orders["order_total"].sum())
+        totals.items_sold += int(quantity.sum())
+        for size, seconds in BUCKET_SIZES.items():
+            start = (orders["created_at"] // seconds * seconds).astype(int)
+            rollup = pd.DataFrame({"start": start, "revenue": orders["order_total"], "items": quantity}) \
+                .groupby("start").agg(orders=("revenue", "size"), revenue=("revenue", "sum"), items=("items", "sum"))
+            for bucket_start, row in rollup.iterrows():
+                totals.add_bucket(size, int(bucket_start), int(row.orders), float(row.revenue), int(row["items"]))
+
+    def report(self, top=10, bucket="hour", last=24):
+        """
+        Headline numbers, the top items and customizations, and the `last`
+        buckets of the hourly or daily rollup.
+        """
+        seconds = BUCKET_SIZES[bucket]
+        with self._lock:
+            totals = self._totals
+            items = heapq.nlargest(top, totals.item_stats.items(), key=lambda entry: (entry[1][0], entry[1][1]))
+            customizations = totals.customizations.most_common(top)
+            sizes = dict(totals.sizes)
+            starts = totals.bucket_starts[bucket][-last:] if last > 0 else []
+            series = [(start, list(totals.buckets[bucket][start])) for start in starts]
+            orders, revenue, items_sold = totals.orders, totals.revenue, totals.items_sold
+            last_order_id, rebuilt_at, rebuilding = self.last_order_id, self.rebuilt_at, self._rebuilding
+
+        return {
+            "orders": orders,
+            "revenue": round(revenue, 2),
+            "items_sold": items_sold,
+            "average_ticket": round(revenue / orders, 2) if orders else 0.0,
+            "average_items_per_order": round(items_sold / orders, 2) if orders else 0.0,
+            "top_items": [
+                {"item": item, "quantity": quantity, "revenue": round(item_revenue, 2), "orders": item_orders}
+                for item, (quantity, item_revenue, item_orders) in items
+            ],
+            "top_customizations": [{"customization": name, "count": count} for name, count in customizations],
+            "sizes": sizes,
+            "rollup": {
+                "bucket": bucket,
+                "seconds": seconds,
+                "series": [
+                    {"start": start, "orders": bucket_orders, "revenue": round(bucket_revenue, 2),
+                     "items": bucket_items,
+                     "average_ticket": round(bucket_revenue / bucket_orders, 2) if bucket_orders else 0.0}
+                    for start, (bucket_orders, bucket_revenue, bucket_items) in series
+                ],
+            },
+            "last_order_id": last_order_id,
+            "rebuilt_at": rebuilt_at,
+            "rebuilding": rebuilding,
+        }
@@ -0,0 +1,113 @@
+import io
+import struct
+import numpy as np
+
+SAMPLE_RATE = 44100
+FLOAT32_BYTES = 4
+
+# Output encodings: file extension and MIME type
+AUDIO_FORMATS = {
+    "wav": ("wav", "audio/wav"),
+    "pcm": ("pcm", "audio/L16"),
+    "mp3": ("mp3", "audio/mpeg"),
+    "opus": ("ogg", "audio/ogg"),
+}
+
+
+def wav_header(sample_rate=SAMPLE_RATE, channels=1, sample_width=2, data_size=None):
+    """
+    Build a 44-byte WAV header. Without `data_size` the sizes are set to the
+    maximum value, which players treat as "read until the stream ends".
+    """
+    if data_size is None:
+        data_size = 0xFFFFFFFF - 36
+    byte_rate = sample_rate * channels * sample_width
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', data_size + 36, b'WAVE',
+        b'fmt ', 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b'data', data_size,
+    )
+
+
+class PCMBuffer:
+    """
+    Growable 16-bit PCM buffer fed with raw 32-bit float chunks.
+
+    Each chunk is read in place with `np.frombuffer`, clipped into a reusable
+    scratch array and scaled straight into the int16 storage, so the only
+    per-chunk allocation happens when the buffer has to grow.
+    """
+
+    def __init__(self, capacity=SAMPLE_RATE * 4):
+        self._data = np.empty(capacity, dtype=np.int16)
+        self._scratch = np.empty(0, dtype=np.float32)
+        self._pending = b''
+        self.size = 0
+
+    def write(self, chunk):
+        """
+        Convert a float32 chunk and append it. Returns the number of samples added.
+        """
+        # SSE chunks are not aligned to sample boundaries, so carry partial samples over
+        if self._pending:
+            chunk = self._pending + bytes(chunk)
+        count = len(chunk) // FLOAT32_BYTES
+        self._pending = bytes(chunk[count * FLOAT32_BYTES:])
+        if not count:
+            return 0
+
+        samples = np.frombuffer(chunk, dtype=np.float32, count=count)
+        self._reserve(self.size + count)
+        if len(self._scratch) < count:
+            self._scratch = np.empty(count, dtype=np.float32)
+        scratch = self._scratch[:count]
+        np.clip(samples, -1.0, 1.0, out=scratch)
+        np.multiply(scratch, 32767, out=self._data[self.size:self.size + count], casting='unsafe')
+        self.size += count
+        return count
+
+    def _reserve(self, needed):
+        if needed <= len(self._data):
+            return
+        capacity = max(needed, len(self._data) * 2)
+        grown = np.empty(capacity, dtype=np.int16)
+        grown[:self.size] = self._data[:self.size]
+        self._data = grown
+
+    def samples(self, start=0):
+        """
+        View of the converted samples from `start`; no copy is made.
+        """
+        return self._data[start:self.size]
+
+    def duration(self):
+        return self.size / SAMPLE_RATE
+
+
+def encode_audio(pcm, audio_format):
+    """
+    Encode a PCMBuffer as `audio_format` (see AUDIO_FORMATS) and return the bytes.
+    WAV and raw PCM need no external encoder; MP3 and Opus go through ffmpeg.
+    """
+    samples = pcm.samples()
+    if audio_format == "pcm":
+        return samples.tobytes()
+    if audio_format == "wav":
+        return b''.join((wav_header(data_size=samples.nbytes), samples.data))
+    if audio_format in ("mp3", "opus"):
+        from pydub import AudioSegment
+
+        segment = AudioSegment(
+            data=samples.tobytes(),
+            frame_rate=SAMPLE_RATE,
+            sample_width=2,  # 16-bit PCM (2 bytes per sample)
+            channels=1,      # Mono
+        )
+        encoded = io.BytesIO()
+        if audio_format == "mp3":
+            segment.export(encoded, format="mp3")
+        else:
+            segment.export(encoded, format="ogg", codec="libopus")
+        return encoded.getvalue()
+    raise ValueError(f"Unsupported audio format: {audio_format}")
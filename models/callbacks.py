@@ -0,0 +1,135 @@
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from models import metrics
+from models.memory import count_message_tokens, count_tokens
+
+# LangChain callback handlers for agent turns and the shared chat models
+
+class PromptTokenCounter(BaseCallbackHandler):
+    """
+    Counts the prompt tokens of every chat model call made during one turn.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        for prompt in messages:
+            self.calls.append(count_message_tokens(prompt))
+
+    @property
+    def total(self):
+        return sum(self.calls)
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """
+    Forwards the text tokens of every chat model call to `on_token`, and
+    `None` when a new call starts. Tool-call chunks are not speech and are
+    skipped, but text a call streams before its tool call is forwarded like
+    any other (see speak_pipelined for how it ends up in the reply).
+    """
+
+    def __init__(self, on_token):
+        self.on_token = on_token
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.on_token(None)
+
+    def on_llm_new_token(self, token, *, chunk=None, **kwargs):
+        message = getattr(chunk, "message", None)
+        if getattr(message, "tool_call_chunks", None):
+            return
+        if token:
+            self.on_token(token)
+
+
+def _model_name(serialized, kwargs):
+    params = kwargs.get("invocation_params") or {}
+    return (params.get("model_name") or params.get("model")
+            or ((serialized or {}).get("kwargs") or {}).get("model_name") or "unknown")
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    Records the duration and token counts of every chat model call in
+    models/metrics.py. Attached to each shared chat model, so it sees agent
+    turns and menu extraction alike. Streamed calls carry no usage, so their
+    tokens are counted locally.
+    """
+
+    def __init__(self):
+        self.calls = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.calls[run_id] = (_model_name(serialized, kwargs), messages, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        call = self.calls.pop(run_id, None)
+        if call is None:
+            return
+        model, messages, start = call
+        metrics.llm_seconds.observe(time.perf_counter() - start, model=model)
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = sum(count_message_tokens(prompt) for prompt in messages)
+            completion_tokens = sum(
+                count_message_tokens([generation.message]) if hasattr(generation, "message") else count_tokens(generation.text)
+                for generations in response.generations for generation in generations
+            )
+        metrics.llm_tokens.inc(prompt_tokens, model=model, kind="prompt")
+        metrics.llm_tokens.inc(completion_tokens, model=model, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        call = self.calls.pop(run_id, None)
+        metrics.llm_errors.inc(model=call[0] if call else "unknown")
+
+
+class TraceHandler(BaseCallbackHandler):
+    """
+    Times the agent's tool calls, and adds model and tool events to a sampled
+    `Trace` so one turn can be followed step by step.
+    """
+
+    def __init__(self, trace=None):
+        self.trace = trace
+        self.runs = {}
+        self.tools = []  # Names of the tools called, in order
+
+    def event(self, kind, **fields):
+        if self.trace is not None:
+            self.trace.event(kind, **fields)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.runs[run_id] = time.perf_counter()
+        self.event("llm_start", model=_model_name(serialized, kwargs), messages=sum(len(m) for m in messages))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self.runs.pop(run_id, None)
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        self.event("llm_end", ms=metrics.Trace.ms(time.perf_counter() - start) if start else None,
+                   tool_calls=[call["name"] for call in getattr(message, "tool_calls", None) or []],
+                   text=generation.text if generation else "")
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name", "unknown")
+        self.tools.append(name)
+        self.runs[run_id] = (name, time.perf_counter())
+        self.event("tool_start", tool=name, input=input_str)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name, start = self.runs.pop(run_id, ("unknown", time.perf_counter()))
+        seconds = time.perf_counter() - start
+        metrics.tool_seconds.observe(seconds, tool=name)
+        self.event("tool_end", tool=name, ms=metrics.Trace.ms(seconds), output=str(output))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        name, start = self.runs.pop(run_id, ("unknown", time.perf_counter()))
+        metrics.tool_seconds.observe(time.perf_counter() - start, tool=name)
+        metrics.tool_errors.inc(tool=name)
+        self.event("tool_error", tool=name, error=repr(error))
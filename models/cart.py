@@ -0,0 +1,168 @@
+from pydantic import BaseModel
+
+
+class OrderLine(BaseModel):
+    item: str
+    quantity: int
+    size: str = ""
+    customizations: list[str] = []
+    unit_price: float
+    line_total: float
+
+
+class OrderEntry(BaseModel):
+    customer_name: str
+    items: str
+    customizations: str
+    price_per_item: float
+    order_total: float
+    lines: list[OrderLine] = []
+
+
+class CartLine:
+    def __init__(self, item, unit_price, quantity=1, size="", customizations=None):
+        self.item = item
+        self.unit_price = unit_price
+        self.quantity = quantity
+        self.size = size
+        self.customizations = list(customizations or [])
+
+    @property
+    def line_total(self):
+        return round(self.unit_price * self.quantity, 2)
+
+    def label(self):
+        name = f"{self.item} ({self.size})" if self.size else self.item
+        return f"{self.quantity} x {name}" if self.quantity > 1 else name
+
+
+class Cart:
+    """
+    The order being built for one customer, updated turn by turn by the agent's
+    cart tools. Prices come from the menu index, never from the LLM.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.customer_name = ""
+
+    def clear(self):
+        self.lines = []
+        self.customer_name = ""
+
+    @property
+    def empty(self):
+        return not self.lines
+
+    def _find(self, item):
+        for line in reversed(self.lines):
+            if line.item == item:
+                return line
+        return None
+
+    @staticmethod
+    def _resolve(menu_index, item):
+        """
+        The menu's name for `item` on an exact or alias hit. Anything else is
+        not guessed at: the nearest names come back for the customer to pick.
+        """
+        i = menu_index.lookup(item)
+        if i is not None:
+            return menu_index.items[i], None
+        nearest = [menu_index.items[j]["item"] for j, _ in menu_index.closest(item, k=3)]
+        if not nearest:
+            return None, f"'{item}' is not on the menu."
+        return None, f"'{item}' is not on the menu. Ask the customer if they meant: {', '.join(nearest)}."
+
+    def add_item(self, menu_index, item, quantity=1, size="", customizations=None):
+        if menu_index.empty:
+            return "No menu available."
+        quantity = 1 if quantity is None else int(quantity)
+        if quantity < 1:
+            return f"Quantity must be at least 1. {self.summary()}"
+        entry, message = self._resolve(menu_index, item)
+        if entry is None:
+            return message
+        price = entry["price"] if entry["price"] is not None else 0.0
+
+        line = self._find(entry["item"])
+        if line is not None and line.size == (size or "") and line.customizations == list(customizations or []):
+            line.quantity += quantity
+        else:
+            line = CartLine(entry["item"], price, quantity, size or "", customizations)
+            self.lines.append(line)
+        return f"Added {quantity} x {entry['item']}. {self.summary()}"
+
+    def remove_item(self, menu_index, item, quantity=None):
+        if quantity is not None and int(quantity) < 1:
+            return f"Quantity must be at least 1. {self.summary()}"
+        entry, message = self._resolve(menu_index, item)
+        if entry is None:
+            return message
+        name = entry["item"]
+        line = self._find(name)
+        if line is None:
+            return f"{name} is not in the order. {self.summary()}"
+        if quantity is not None and int(quantity) < line.quantity:
+            line.quantity -= int(quantity)
+        else:
+            self.lines.remove(line)
+        return f"Removed {name}. {self.summary()}"
+
+    def update_item(self, menu_index, item, size="", customizations=None):
+        entry, message = self._resolve(menu_index, item)
+        if entry is None:
+            return message
+        name = entry["item"]
+        line = self._find(name)
+        if line is None:
+            return f"{name} is not in the order yet. {self.summary()}"
+        if size:
+            line.size = size
+        for customization in customizations or []:
+            if customization not in line.customizations:
+                line.customizations.append(customization)
+        return f"Updated {name}. {self.summary()}"
+
+    def set_name(self, name):
+        self.customer_name = name.strip()
+        return f"Name set to {self.customer_name}."
+
+    def total(self):
+        return round(sum(line.line_total for line in self.lines), 2)
+
+    def summary(self):
+        if not self.lines:
+            return "The order is empty."
+        parts = []
+        for line in self.lines:
+            text = line.label()
+            if line.customizations:
+                text += f" [{', '.join(line.customizations)}]"
+            parts.append(f"{text}: ${line.line_total:.2f}")
+        name = f" for {self.customer_name}" if self.customer_name else ""
+        return f"Order{name}: " + "; ".join(parts) + f". Total: ${self.total():.2f}."
+
+    def to_order_entry(self):
+        quantity = sum(line.quantity for line in self.lines)
+        total = self.total()
+        return OrderEntry(
+            customer_name=self.customer_name,
+            items=", ".join(line.label() for line in self.lines),
+            customizations=", ".join(
+                f"{line.item}: {', '.join(line.customizations)}" for line in self.lines if line.customizations
+            ),
+            price_per_item=round(total / quantity, 2) if quantity else 0.0,
+            order_total=total,
+            lines=[
+                OrderLine(
+                    item=line.item,
+                    quantity=line.quantity,
+                    size=line.size,
+                    customizations=line.customizations,
+                    unit_price=line.unit_price,
+                    line_total=line.line_total,
+                )
+                for line in self.lines
+            ],
+        )
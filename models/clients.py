@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import uuid
+
+# Vendor clients are created on first use and shared by every request, so
+# importing the app never touches the network and connections are reused.
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 60))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+VOICE_CACHE_DIR = os.getenv("VOICE_CACHE_DIR", os.path.join("uploads", "voices"))
+
+_clients = {}
+_lock = threading.RLock()  # Factories may build the clients they depend on
+
+
+def _shared(key, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = factory()
+    return client
+
+
+def http_client():
+    """
+    Pooled httpx client behind the OpenAI SDK.
+    """
+    def build():
+        import httpx
+        return httpx.Client(
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=10.0),
+        )
+    return _shared("http", build)
+
+
+def http_session():
+    """
+    Pooled requests session for streaming calls (Cartesia SSE). Connection
+    errors, resets before the response starts and 5xx responses are retried
+    with backoff; synthesis requests are safe to repeat, so POST is included.
+    """
+    def build():
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        session = requests.Session()
+        retry = Retry(total=HTTP_RETRIES, connect=HTTP_RETRIES, read=HTTP_RETRIES, status=HTTP_RETRIES,
+                      backoff_factor=0.2, status_forcelist=(500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "POST"}), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    return _shared("session", build)
+
+
+def chat_model(model_name, temperature=0.0, **kwargs):
+    """
+    A ChatOpenAI client per configuration, all on the shared connection pool,
+    with every call timed and its tokens counted in /metrics.
+    """
+    def build():
+        from langchain_openai import ChatOpenAI
+        from models.callbacks import LLMMetricsHandler
+        return ChatOpenAI(model_name=model_name, temperature=temperature,
+                          openai_api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client(),
+                          callbacks=[LLMMetricsHandler()], **kwargs)
+    return _shared(("chat", model_name, temperature, tuple(sorted(kwargs.items()))), build)
+
+
+def cartesia():
+    def build():
+        from cartesia import Cartesia
+        return Cartesia(api_key=os.getenv("CARTESIA_API_KEY"))
+    return _shared("cartesia", build)
+
+
+def voice_embedding(voice_id, cache_dir=VOICE_CACHE_DIR):
+    """
+    The embedding of a Cartesia voice, fetched once and then read from disk.
+    """
+    def load():
+        path = os.path.join(cache_dir, f"{voice_id}.json")
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            pass
+        embedding = cartesia().voices.get(id=voice_id)["embedding"]
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = os.path.join(cache_dir, f".{voice_id}.{uuid.uuid4().hex}")
+        with open(tmp_path, "w") as f:
+            json.dump(embedding, f)
+        os.replace(tmp_path, path)
+        return embedding
+    return _shared(("voice", voice_id), load)
@@ -1,29 +1,38 @@
-from openai import OpenAI
+import logging
 import re
+import threading
 import time
-from pydantic import BaseModel
-from langchain.agents import Tool, AgentExecutor, ConversationalChatAgent
-from langchain.memory import ConversationBufferMemory
-from langchain_openai import ChatOpenAI
-from langchain.prompts import SystemMessagePromptTemplate
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-import os
-import pandas as pd
+from models.cart import Cart, OrderEntry
+from models.menu_index import MenuIndex
+from models.fast_path import FastPathRouter
+from models.prompt_examples import ExampleSelector
+from models.response_cache import MENU_TOOLS, ResponseCache
+from models.clients import chat_model
+from models.metrics import Trace, conversations_reset, orders_placed
+
+# LangChain is imported on first use (see DialogueModel.initialize_agent), so
+# importing this module stays fast
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 SYS_PROMPT = """
 You are a friendly AI cashier at a café. Your job is to take orders from customers.
 Only provide information from the menu when asked. Use the MenuPriceAllergenBasic
 tool for questions about prices and allergens. Only use the MenuDescription
 tool when customers specifically ask for item descriptions or more details. 
-Examples:
-- user input: 'How much is the Latte?' Choose tool: MenuPriceAllergenBasic.
-- user input: 'What's in the Mocha?' Choose tool: MenuDescription.
-- user input: 'Can I get a large size?' Choose tool: MenuPriceAllergenBasic.
-- user input: 'Can I get a Ceaser Salad?' Choose tool: MenuPriceAllergenBasic.
-- user input: 'How long will my Cappuccino take?' Choose tool: MenuPriceAllergenBasic.
+Keep the order up to date with the cart tools: use AddToCart when the customer
+orders an item, RemoveFromCart when they drop one, UpdateCartItem for sizes and
+customizations, and SetCustomerName when they give their name. Use ViewCart to
+read back the order or the total. Follow the examples given with each request
+for the tool to choose and the style of reply.
 You should: 
 - Engage in a human-like conversation, simulating the experience of ordering at a café. 
 - Respond with short, concise sentences that mimic how a human cashier would communicate. 
@@ -32,113 +41,270 @@ You should:
 - Avoid long, verbose responses. Keep your answers friendly and straightforward.
 - When asked a question about the menu, do not provide the description unless explicitly asked.
 - Add humorous short responses to make the conversation more engaging.
-Examples: 
-- user input: 'How much is the Latte?' AI response: '$4.50'.
-- user input: 'What's in the Mocha?' AI response: 'Espresso, steamed milk, chocolate syrup'.
-- user input: 'Can I get a large size?' AI response: 'Sure!'.
-- user input: 'Can I get a Ceaser Salad?' AI response: 'Yes, it's $8.50'.
-- user input: "How long will my Cappuccino take?" AI response: "About 5 minutes."
-- user input: "Can I get almond milk?" AI response: "Sure, we have that!"
-- user input: "Can I make my order to-go?" AI response: "Of course, to-go it is!"
-- user input: "What's the price of the Iced Coffee?" AI response: "$3.50."
-- user input: "What size can I get the Latte in?" AI response: "Small, medium, or large?"
-- user input: "What's in the Turkey Sandwich?" AI response: "Turkey, lettuce, tomato, mayo."
-- user input: "Do you have oat milk?" AI response: "Yep, we do!"
-- user input: "Can I pay with cash?" AI response: "Sure, cash works."
-- user input: "Do you have gluten-free options?" AI response: "Yes, we do!"
-- user input: "What's the total for a large latte and a muffin?" AI response: "That'll be $8.25."
-- user_input: 'Do you have soy milk?' AI response: 'Yes, we have soy milk as a substitute.'
-- user_input: 'I'm allergic to nuts. Is the almond croissant safe for me?' AI response: 'The almond croissant contains nuts.'
-- user_input: 'Can you make the sandwich gluten-free?' AI response: 'We can substitute gluten-free bread for you.'
-- user_input: 'Is the Caesar salad dressing dairy-free?' AI response: 'The dressing contains dairy.'
-- user_input: 'Can I get extra syrup in my drink?' AI response: 'Yes, we can add extra syrup for $0.50.'
-- user_input: 'Does the muffin have any eggs in it?' AI response: 'Yes, the muffin contains eggs.'
-- user_input: 'Can I swap bacon for avocado in my sandwich?' AI response: 'We can do that for an additional $1.'
-- user_input: 'I'm vegan. Is the soup vegan-friendly?' AI response: 'The soup isn't vegan. Let me call the manager to assist with other choices.'
-- user_input: 'Does the iced tea have caffeine?' AI response: 'Yes, it has a mild amount of caffeine.'
-- user_input: 'Can you make the salad without croutons?' AI response: 'Yes, we can remove the croutons for you.'"
 """
-system_message = SystemMessagePromptTemplate.from_template(SYS_PROMPT)
 
-class OrderEntry(BaseModel):
-    customer_name: str
-    items: str
-    customizations: str
-    price_per_item: float
-    order_total: float
 
+def build_prompt():
+    from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+    return ChatPromptTemplate.from_messages([
+        ("system", SYS_PROMPT),
+        MessagesPlaceholder("chat_history"),
+        # Few-shot examples picked for this input; kept out of the system prompt
+        # so the prefix sent every turn stays the same
+        ("system", "{examples}"),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
 
-class MenuTool:
-    def __init__(self, menu_df, include_description=False):
+
+# Session whose turn is being handled; the shared cart tools act on its cart
+current_session = ContextVar("current_session")
+
+
+class MenuItemInput(BaseModel):
+    item_name: str = Field(description="Name of the menu item")
+
+
+class AddToCartInput(BaseModel):
+    item: str = Field(description="Name of the menu item")
+    quantity: int = Field(default=1, description="How many to add")
+    size: str = Field(default="", description="Size, if the customer gave one")
+    customizations: list[str] = Field(default=[], description="Customizations such as 'oat milk' or 'no croutons'")
+
+
+class RemoveFromCartInput(BaseModel):
+    item: str = Field(description="Name of the menu item")
+    quantity: Optional[int] = Field(default=None, description="How many to remove; leave out to remove the item entirely")
+
+
+class UpdateCartItemInput(BaseModel):
+    item: str = Field(description="Name of an item already in the order")
+    size: str = Field(default="", description="New size")
+    customizations: list[str] = Field(default=[], description="Customizations to add")
+
+
+class CustomerNameInput(BaseModel):
+    name: str = Field(description="The customer's name")
+
+
+class MenuSnapshot:
+    """
+    A parsed menu with its lookup index and fast-path router. Snapshots are
+    built in full before they are published and never change afterwards.
+    """
+    def __init__(self, menu_df, version=0):
         self.menu_df = menu_df
+        self.index = MenuIndex(menu_df)
+        self.router = FastPathRouter(self.index)
+        self.version = version
+
+
+# The menu snapshot the running turn started with
+current_menu = ContextVar("current_menu")
+
+
+class MenuTool:
+    def __init__(self, include_description=False):
         self.include_description = include_description
 
     def get_item_info(self, item_name):
-        if self.menu_df.empty:
-            return "No menu available."
-        if item_name.lower() not in self.menu_df['item'].str.lower().values:
-            if self.include_description:
-                return self.menu_df.to_string(index=False)
-            else:
-                return self.menu_df[['item', 'price', 'allergens']].to_string(index=False)
-        item = self.menu_df[self.menu_df['item'].str.lower() == item_name.lower()]
-        if self.include_description:
-            return item.to_string(index=False)
-        else:
-            return f"{item['item'].values[0]}: ${item['price'].values[0]}. Allergens: {item['allergens'].values[0]}"
-        
+        return current_menu.get().index.answer(item_name.strip().strip("'\""), self.include_description)
+
+
+class CartTool:
+    """
+    Structured cart operations exposed to the agent. They act on the cart of
+    the session whose turn is running, priced from that turn's menu.
+    """
+    @staticmethod
+    def cart():
+        return current_session.get().cart
+
+    @staticmethod
+    def menu_index():
+        return current_menu.get().index
+
+    def add_item(self, item, quantity=1, size="", customizations=None):
+        return self.cart().add_item(self.menu_index(), item, quantity, size, customizations)
+
+    def remove_item(self, item, quantity=None):
+        return self.cart().remove_item(self.menu_index(), item, quantity)
+
+    def update_item(self, item, size="", customizations=None):
+        return self.cart().update_item(self.menu_index(), item, size, customizations)
+
+    def set_name(self, name):
+        return self.cart().set_name(name)
+
+    def view(self):
+        return self.cart().summary()
+
+
+class DialogueSession:
+    """
+    Conversation state for a single customer.
+    """
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.conversation_history = []
+        self.cart = Cart()
+        self._memory = None
+        self.agent_executor = None
+        self.agent = None
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+    @property
+    def memory(self):
+        if self._memory is None:
+            from models.memory import TokenBudgetMemory
+            self._memory = TokenBudgetMemory(cart=self.cart)
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory):
+        self._memory = memory
+
+    def reset(self):
+        self.conversation_history = []
+        self.cart.clear()
+        if self._memory is not None:
+            self._memory.clear()
+
 
 class DialogueModel:
-    def __init__(self, menu_df=pd.DataFrame()):
+    def __init__(self, menu_df=None, llm=None):
         """
         Initialize the DialogueModel with the menu dataframe.
-        """
-        self.menu_df = menu_df
-        self.conversation_history = []
-        self.initialize_agent()
 
+        The menu, tools, LLM client and agent are shared by every customer;
+        per-customer memory lives in a DialogueSession. The agent is built
+        once, on first use: tools look up the menu snapshot of the turn they
+        run in, so swapping menus never touches the agent or session memory.
+        `llm` defaults to the shared gpt-4o client.
+        """
+        self._menu_lock = threading.Lock()
+        self.menu = MenuSnapshot(menu_df)
+        self.example_selector = ExampleSelector()
+        self.response_cache = ResponseCache()
+        self.default_session = DialogueSession("default")
+        self._stats_lock = threading.Lock()
+        self.fast_path_turns = 0
+        self.fast_path_seconds = 0.0
+        self.cache_turns = 0
+        self.agent_turns = 0
+        self.agent_seconds = 0.0
+        self.prompt_tokens = 0
+        self.prompt_tokens_max = 0
+        self.recent_prompt_tokens = deque(maxlen=20)
+        self.llm = llm
+        self.agent = None
+        self._agent_lock = threading.Lock()
+
+    def ensure_agent(self):
+        if self.agent is None:
+            with self._agent_lock:
+                if self.agent is None:
+                    self.initialize_agent()
+        return self.agent
 
     def initialize_agent(self):
-        self.menu_tool_basic_ = MenuTool(self.menu_df, include_description=False)
-        self.menu_tool_with_description_ = MenuTool(self.menu_df, include_description=True)
+        from langchain.agents import create_tool_calling_agent
+        from langchain_core.tools import StructuredTool
+
+        self.menu_tool_basic_ = MenuTool(include_description=False)
+        self.menu_tool_with_description_ = MenuTool(include_description=True)
+        self.cart_tool_ = CartTool()
 
         # Define the menu retrieval tools
-        self.menu_tool_basic = Tool(
-            name="MenuPriceAllergenBasic",
+        self.menu_tool_basic = StructuredTool.from_function(
             func=self.menu_tool_basic_.get_item_info,
-            description="Useful for answering questions about menu prices or allergens without descriptions."
+            name="MenuPriceAllergenBasic",
+            description="Useful for answering questions about menu prices or allergens without descriptions.",
+            args_schema=MenuItemInput
         )
-        self.menu_tool_with_description = Tool(
-            name="MenuDescription",
+        self.menu_tool_with_description = StructuredTool.from_function(
             func=self.menu_tool_with_description_.get_item_info,
-            description="Useful for describing menu items."
+            name="MenuDescription",
+            description="Useful for describing menu items.",
+            args_schema=MenuItemInput
         )
 
-        # Initialize the conversational agent
-        self.agent = ConversationalChatAgent.from_llm_and_tools(
-            llm=ChatOpenAI(temperature=0.7, model_name="gpt-4o",#"gpt-3.5-turbo", 
-                           openai_api_key=os.getenv("OPENAI_API_KEY")),
-            tools=[self.menu_tool_basic, self.menu_tool_with_description],
-            system_message=system_message.prompt.template,
-            verbose=True
+        # Define the cart tools
+        self.cart_tools = [
+            StructuredTool.from_function(
+                func=self.cart_tool_.add_item,
+                name="AddToCart",
+                description="Add a menu item to the customer's order.",
+                args_schema=AddToCartInput
+            ),
+            StructuredTool.from_function(
+                func=self.cart_tool_.remove_item,
+                name="RemoveFromCart",
+                description="Remove an item from the customer's order.",
+                args_schema=RemoveFromCartInput
+            ),
+            StructuredTool.from_function(
+                func=self.cart_tool_.update_item,
+                name="UpdateCartItem",
+                description="Set the size or add customizations for an item already in the order.",
+                args_schema=UpdateCartItemInput
+            ),
+            StructuredTool.from_function(
+                func=self.cart_tool_.set_name,
+                name="SetCustomerName",
+                description="Record the customer's name for the order.",
+                args_schema=CustomerNameInput
+            ),
+            StructuredTool.from_function(
+                func=self.cart_tool_.view,
+                name="ViewCart",
+                description="Show the items in the customer's order and the total."
+            ),
+        ]
+        self.tools = [self.menu_tool_basic, self.menu_tool_with_description] + self.cart_tools
+
+        # Initialize the tool-calling agent
+        self.agent = create_tool_calling_agent(
+            llm=self.llm or chat_model("gpt-4o", temperature=0.7, streaming=True),#"gpt-3.5-turbo"
+            tools=self.tools,
+            prompt=build_prompt()
         )
 
-        # Set up the conversation memory
-        self.memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+    @property
+    def menu_df(self):
+        return self.menu.menu_df
 
-        # Create the agent executor
-        self.agent_executor = AgentExecutor.from_agent_and_tools(
-            agent=self.agent,
-            tools=[self.menu_tool_basic, self.menu_tool_with_description],
-            memory=self.memory,
-            verbose=True
-        )
+    @property
+    def menu_index(self):
+        return self.menu.index
 
+    def new_session(self, session_id):
+        return DialogueSession(session_id)
 
-    def reset_conversation(self):
-        self.conversation_history = []
+    def get_agent_executor(self, session):
+        """
+        Bind the shared agent to the session's memory.
+        """
+        from langchain.agents import AgentExecutor
+
+        self.ensure_agent()
+        executor = session.agent_executor
+        if executor is None or session.agent is not self.agent:
+            executor = AgentExecutor.from_agent_and_tools(
+                agent=self.agent,
+                tools=self.tools,
+                memory=session.memory,
+            )
+            session.agent_executor = executor
+            session.agent = self.agent
+        return executor
 
-        print("conversation reset")
+
+    def reset_conversation(self, session=None):
+        session = session or self.default_session
+        session.reset()
+        conversations_reset.inc()
 
 
     def check_order_completion(self, user_input):
@@ -148,85 +314,141 @@ class DialogueModel:
         # Check if the user input contains any of the completion phrases
         return re.search(completion_pattern, user_input, re.IGNORECASE)
 
+    def build_menu(self, menu_df):
+        """
+        Build the index and router for a new menu without publishing it.
+        This is the slow part of a menu change and runs off the request path.
+        """
+        with self._menu_lock:
+            version = self.menu.version + 1
+        return MenuSnapshot(menu_df, version)
+
+    def swap_menu(self, snapshot):
+        """
+        Publish a built menu. Turns already running finish on the menu they
+        started with; every later turn sees the new one. Conversations and
+        carts are kept.
+        """
+        with self._menu_lock:
+            if snapshot.version <= self.menu.version:
+                snapshot.version = self.menu.version + 1
+            self.menu = snapshot
+            self.response_cache.invalidate(snapshot.version)
+        logger.info("Menu v%d active with %d items", snapshot.version, len(snapshot.index.items))
+
     def set_menu(self, menu_df):
         """
         Set the menu dataframe for the dialogue model.
         """
-        self.menu_df = menu_df
-        self.initialize_agent()
+        self.swap_menu(self.build_menu(menu_df))
 
     def get_menu_info(self, query):
         """
         Retrieve menu information. This is the function used by the tool.
         """
+        if self.menu_df is None:
+            return "No menu available."
         return f"Here's our full menu:\n{self.menu_df.to_string(index=False)}"
 
 
-    def get_response(self, user_input):
+    def get_response(self, user_input, session=None, on_token=None, trace=None):
         """
         Engage in a conversation with the agent using the user input.
+        `on_token` receives the reply's tokens as the LLM generates them.
+        The turn's stages, model calls and tool calls are added to `trace`.
         """
-        response = self.agent_executor.invoke(user_input)
-        output = str(response['output'])
-
-        self.conversation_history.append(("User", user_input))
-        self.conversation_history.append(("AI", output))
+        session = session or self.default_session
+        trace = trace or Trace("dialogue", sampled=False)
+        with session.lock:
+            start = time.perf_counter()
+            menu = self.menu
+            output = menu.router.route(user_input)
+            route = "fast_path"
+            # Replies are shared only on a customer's first turn with nothing
+            # ordered; later turns may lean on what they said earlier ("I'm
+            # vegan"), so they neither read nor write the cache
+            cacheable = (output is None and not session.conversation_history and not session.cart.lines
+                         and self.response_cache.cacheable(user_input))
+            if cacheable:
+                output = self.response_cache.get(user_input, menu.version)
+                route = "cache"
+            if output is not None:
+                # Answered without the agent; still record the turn for it
+                session.memory.save_context({"input": user_input}, {"output": output})
+                seconds = time.perf_counter() - start
+                self._record_turn(route, seconds)
+                trace.observe(route, seconds, start)
+            else:
+                session_token = current_session.set(session)
+                menu_token = current_menu.set(menu)
+                from models.callbacks import PromptTokenCounter, TokenStreamHandler, TraceHandler
+                counter = PromptTokenCounter()
+                tracer = TraceHandler(trace)
+                callbacks = [counter, tracer]
+                if on_token is not None:
+                    callbacks.append(TokenStreamHandler(on_token))
+                try:
+                    response = self.get_agent_executor(session).invoke(
+                        {"input": user_input, "examples": self.example_selector.render(user_input)},
+                        config={"callbacks": callbacks})
+                finally:
+                    current_menu.reset(menu_token)
+                    current_session.reset(session_token)
+                output = str(response['output'])
+                seconds = time.perf_counter() - start
+                self._record_turn("agent", seconds, counter.total)
+                trace.observe("agent", seconds, start)
+                # A reply that only used the menu is the same for everyone
+                if cacheable and set(tracer.tools) <= MENU_TOOLS:
+                    self.response_cache.put(user_input, output, menu.version, seconds)
+
+            session.conversation_history.append(("User", user_input))
+            session.conversation_history.append(("AI", output))
         return output
 
-    def place_order(self):
-        """
-        Generate an order summary using the LLM agent.
+    def _record_turn(self, route, seconds, prompt_tokens=0):
+        with self._stats_lock:
+            if route == "fast_path":
+                self.fast_path_turns += 1
+                self.fast_path_seconds += seconds
+            elif route == "cache":
+                self.cache_turns += 1
+            else:
+                self.agent_turns += 1
+                self.agent_seconds += seconds
+                self.prompt_tokens += prompt_tokens
+                self.prompt_tokens_max = max(self.prompt_tokens_max, prompt_tokens)
+                self.recent_prompt_tokens.append(prompt_tokens)
+
+    def stats(self):
+        with self._stats_lock:
+            turns = self.fast_path_turns + self.cache_turns + self.agent_turns
+            return {
+                "turns": turns,
+                "fast_path_turns": self.fast_path_turns,
+                "cache_turns": self.cache_turns,
+                "agent_turns": self.agent_turns,
+                "fast_path_rate": self.fast_path_turns / turns if turns else 0.0,
+                "fast_path_avg_ms": 1000 * self.fast_path_seconds / self.fast_path_turns if self.fast_path_turns else 0.0,
+                "agent_avg_ms": 1000 * self.agent_seconds / self.agent_turns if self.agent_turns else 0.0,
+                # Prompt tokens sent per agent turn, summed over its LLM calls
+                "prompt_tokens_avg": self.prompt_tokens / self.agent_turns if self.agent_turns else 0.0,
+                "prompt_tokens_max": self.prompt_tokens_max,
+                "prompt_tokens_recent": list(self.recent_prompt_tokens),
+                "response_cache": self.response_cache.stats(),
+            }
+
+    def place_order(self, session=None):
         """
-        conversation_text = "\n".join([f"{speaker}: {message}" for speaker, message in self.conversation_history])
-
-        summary_prompt =f"""
-        Based on the following conversation history, generate an order summary in the specified format:
-
-        {conversation_text}
-        The output should be of the format:
-        Customer Name: [Name]
-        Items: [Comma-separated list of items]
-        Customizations: [Comma-separated list of customizations]
-        Price per Item: [Average price per item]
-        Order Total: [Total price of the order]
-
-        Only include information that was explicitly mentioned in the conversation.
-        If any information is missing, leave it blank or use 0 for numerical values.
+        Turn the session's cart into an order entry. Prices and totals come
+        from the menu, so no LLM call is needed.
         """
-        response = self.agent_executor.invoke(summary_prompt)
-
-        # Parse the response into an OrderEntry object
-        lines = response['output'].strip().split('\n')
-        order_dict = {"customer_name": "", "items": "", "customizations": "", "price_per_item": 0, "order_total": 0}
-        
-        for line in lines:
-            if ':' in line:
-                key, value = line.split(':', 1)
-                order_dict[key.strip().lower().replace(' ', '_')] = value.strip()
-
-        # Convert price strings to floats
-        try:
-            order_dict['price_per_item'] = float(order_dict.get('price_per_item', '0').replace('$', '') or 0)
-            order_dict['order_total'] = float(order_dict.get('order_total', '0').replace('$', '') or 0)
-        except Exception as e:
-            print("Error parsing price values. Setting to 0.")
-            order_dict['price_per_item'] = 0
-            order_dict['order_total'] = 0
-
-        print("Order placed")
-        self.reset_conversation()
-
-        try:
-            return OrderEntry(
-                customer_name=order_dict.get('customer_name', ''),
-                items=order_dict.get('items', ''),
-                customizations=order_dict.get('customizations', ''),
-                price_per_item=order_dict['price_per_item'],
-                order_total=order_dict['order_total']
-            )
-        except Exception as e:
-            print(f"Error creating OrderEntry: {e}")
-            return None
+        session = session or self.default_session
+        with session.lock:
+            order = session.cart.to_order_entry()
+            orders_placed.inc()
+            self.reset_conversation(session)
+        return order
 
 # SYS_PROMPT = (
 #                 "You are an AI cashier that helps customers with menu items, prices, and order questions in a friendly and human-like way. "
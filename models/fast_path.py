@@ -0,0 +1,125 @@
+import re
+from models.menu_index import normalize
+
+# Anything that changes the order goes to the agent
+ORDER_PATTERN = re.compile(
+    r"\b(can i (get|have)|could i (get|have)|i'?ll (have|take|get)|i want|i'?d like|give me|add|order|"
+    r"make (it|my|the)|swap|substitute|without|extra|instead|remove|cancel|change)\b"
+)
+PRICE_PATTERN = re.compile(r"\b(how much|price|prices|cost|costs)\b")
+DESCRIPTION_PATTERN = re.compile(
+    r"\b(what'?s in|what is in|what goes in|what comes (in|on|with)|describe|tell me about)\b"
+)
+ALLERGEN_PATTERN = re.compile(r"\b(allerg\w*|contain|contains)\b")
+
+# Quantities, sizes and modifiers change the answer (or the order), so any of
+# them outside the item's own name sends the turn to the agent
+QUANTITY_WORDS = {
+    "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve",
+    "dozen", "couple", "pair", "few", "half", "double", "triple", "both", "each", "every",
+}
+SIZE_WORDS = {
+    "small", "medium", "large", "regular", "tall", "grande", "venti", "short", "mini", "big",
+    "size", "sizes", "oz", "ounce", "ounces", "kid", "kids",
+}
+MODIFIER_WORDS = {
+    "discount", "discounts", "deal", "deals", "special", "specials", "coupon", "coupons", "promo", "combo",
+    "refill", "refills", "decaf", "shot", "shots", "syrup", "topping", "toppings", "oat", "coconut", "skim",
+    "whole", "nonfat", "sugar", "sweetener", "plus", "upgrade",
+}
+FALL_THROUGH_WORDS = QUANTITY_WORDS | SIZE_WORDS | MODIFIER_WORDS
+
+# Allergen words a customer might use, mapped to the terms menus list
+ALLERGEN_TERMS = {
+    "nut": ("nut", "nuts", "peanut", "almond", "hazelnut", "walnut", "pecan", "cashew", "pistachio"),
+    "dairy": ("dairy", "milk", "lactose", "cheese", "cream", "butter"),
+    "gluten": ("gluten", "wheat"),
+    "egg": ("egg", "eggs"),
+    "soy": ("soy", "soya"),
+    "sesame": ("sesame",),
+    "fish": ("fish",),
+    "shellfish": ("shellfish", "shrimp", "crab", "lobster"),
+}
+ALLERGEN_LABELS = {"nut": "nuts", "egg": "eggs"}
+NO_ALLERGENS = {"", "none", "none listed", "n a", "na", "unknown"}
+
+
+def _mentioned_allergen(words):
+    for canonical, terms in ALLERGEN_TERMS.items():
+        if any(term in words for term in terms):
+            return canonical
+    return None
+
+
+def _lists_allergen(allergens, canonical):
+    words = set(normalize(allergens).split())
+    return any(term in words or term + "s" in words for term in ALLERGEN_TERMS[canonical])
+
+
+class FastPathRouter:
+    """
+    Answers simple price, allergen and description questions straight from
+    the menu index. `route` returns None whenever it is not confident, so the
+    turn falls through to the agent.
+    """
+
+    def __init__(self, menu_index):
+        self.menu_index = menu_index
+
+    def route(self, user_input):
+        if self.menu_index.empty:
+            return None
+        text = user_input.lower()
+        if ORDER_PATTERN.search(text):
+            return None
+
+        mentions = self.menu_index.find_mentions(text)
+        if len(mentions) != 1:
+            return None
+        item = self.menu_index.items[mentions[0]]
+
+        words = set(normalize(text).split())
+        extra = words - set(normalize(item["item"]).split())
+        if extra & FALL_THROUGH_WORDS or any(word.isdigit() for word in extra):
+            return None
+
+        intents = [
+            name for name, pattern in (
+                ("price", PRICE_PATTERN),
+                ("description", DESCRIPTION_PATTERN),
+            ) if pattern.search(text)
+        ]
+        # Only answered for a named allergen ("any nuts?") or allergens in general
+        allergen = _mentioned_allergen(words)
+        if allergen and (ALLERGEN_PATTERN.search(text) or {"does", "do", "is", "have", "has"} & words):
+            intents.append("allergen")
+        elif allergen is None and re.search(r"\ballerg", text):
+            intents.append("allergen")
+        if len(intents) != 1:
+            return None
+
+        intent = intents[0]
+        if intent == "price":
+            if item["price"] is None:
+                return None
+            return f"${item['price']:.2f}."
+        if intent == "allergen":
+            return self._allergen_answer(item, allergen)
+        if intent == "description":
+            if not item["description"]:
+                return None
+            return item["description"].rstrip(".") + "."
+        return None
+
+    def _allergen_answer(self, item, allergen):
+        allergens = item["allergens"]
+        if normalize(allergens) in NO_ALLERGENS:
+            # Missing allergen data is not the same as "safe"; let the agent handle it
+            return None
+        if allergen is None:
+            return f"The {item['item']} contains {allergens}."
+        label = ALLERGEN_LABELS.get(allergen, allergen)
+        # Phrased without yes/no so it reads right for "has X?" and "X-free?" alike
+        if _lists_allergen(allergens, allergen):
+            return f"The {item['item']} contains {label}."
+        return f"The {item['item']} doesn't list {label} as an allergen."
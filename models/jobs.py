@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from models.metrics import jobs_failed
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    A unit of background work with progress reporting and cooperative
+    cancellation: the work function calls `update` between steps, which
+    raises JobCancelled once the job has been cancelled.
+    """
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def update(self, stage=None, progress=None):
+        self.check()
+        if stage is not None:
+            self.stage = stage
+        if progress is not None:
+            self.progress = round(min(max(progress, 0.0), 1.0), 3)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a small thread pool and keeps the most recent ones for
+    status polling.
+    """
+
+    def __init__(self, max_workers=1, keep=100):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.keep = keep
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue `fn(job, *args, **kwargs)`; its return value becomes the job result.
+        """
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs
+            for job_id in list(self._jobs):
+                if len(self._jobs) <= self.keep:
+                    break
+                if self._jobs[job_id].status in FINISHED:
+                    del self._jobs[job_id]
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if job.cancelled:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            jobs_failed.inc(kind=job.kind)
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            self._finish(job, FAILED)
+        else:
+            job.progress = 1.0
+            self._finish(job, DONE)
+
+    @staticmethod
+    def _finish(job, status):
+        job.stage = status
+        job.finished_at = time.time()
+        job.status = status
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Ask a job to stop. Queued jobs never start; running jobs stop at
+        their next progress update. Returns the job, or None if unknown.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            job._cancel.set()
+            if job.status == QUEUED:
+                self._finish(job, CANCELLED)
+        return job
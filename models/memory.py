@@ -0,0 +1,156 @@
+import hashlib
+import os
+import tempfile
+from typing import Any, Dict, List
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import SystemMessage, get_buffer_string
+
+MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", 1000))
+MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", 6))
+MESSAGE_OVERHEAD = 4  # Role and separator tokens per chat message
+TOKENIZER_MODEL = os.getenv("TOKENIZER_MODEL", "gpt-4o")
+# Where tiktoken downloads encodings from; the file is cached under the sha1 of the URL
+ENCODING_URL = "https://openaipublic.blob.core.windows.net/encodings/{}.tiktoken"
+
+_encoding = None
+
+
+def cached_encoding_path(name):
+    """
+    Where tiktoken keeps the `name` encoding file (TIKTOKEN_CACHE_DIR, as tiktoken resolves it).
+    """
+    if "TIKTOKEN_CACHE_DIR" in os.environ:
+        cache_dir = os.environ["TIKTOKEN_CACHE_DIR"]
+    elif "DATA_GYM_CACHE_DIR" in os.environ:
+        cache_dir = os.environ["DATA_GYM_CACHE_DIR"]
+    else:
+        cache_dir = os.path.join(tempfile.gettempdir(), "data-gym-cache")
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, hashlib.sha1(ENCODING_URL.format(name).encode()).hexdigest())
+
+
+def load_encoding():
+    """
+    The tiktoken encoding of TOKENIZER_MODEL (o200k_base for gpt-4o), or None
+    if its file isn't already cached. Counting never downloads it.
+    """
+    try:
+        import tiktoken
+        from tiktoken.model import encoding_name_for_model
+
+        name = encoding_name_for_model(TOKENIZER_MODEL)
+        path = cached_encoding_path(name)
+        if path is None or not os.path.exists(path):
+            return None
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """
+    Tokens in `text` for TOKENIZER_MODEL. Falls back to a chars/4 estimate
+    when its encoding file is not cached.
+    """
+    global _encoding
+    if _encoding is None:
+        _encoding = load_encoding() or False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages):
+    total = 0
+    for message in messages:
+        total += count_tokens(str(message.content)) + MESSAGE_OVERHEAD
+        if getattr(message, "tool_calls", None):
+            total += count_tokens(str(message.tool_calls))
+    return total
+
+
+def cart_summary(cart, dropped_turns=0):
+    """
+    Compact structured state of the order: items, customizations and name.
+    """
+    parts = []
+    if cart is not None and cart.lines:
+        parts.append("Items: " + "; ".join(line.label() for line in cart.lines))
+        customizations = [f"{line.item}: {', '.join(line.customizations)}" for line in cart.lines if line.customizations]
+        if customizations:
+            parts.append("Customizations: " + "; ".join(customizations))
+    if cart is not None and cart.customer_name:
+        parts.append(f"Name: {cart.customer_name}")
+    if not parts and not dropped_turns:
+        return ""
+    header = "Order so far"
+    if dropped_turns:
+        header += f" ({dropped_turns} earlier turn{'s' if dropped_turns != 1 else ''} not shown)"
+    return "\n".join([header + ":"] + (parts or ["Nothing ordered yet."]))
+
+
+class TokenBudgetMemory(BaseChatMemory):
+    """
+    Chat memory that sends the last `max_turns` turns verbatim, trimmed to fit
+    `max_tokens`, plus a structured summary of the order built from the cart.
+
+    The cart is the source of truth for what was ordered, so older turns can
+    be dropped without losing items, customizations or the customer's name.
+    """
+
+    memory_key: str = "chat_history"
+    input_key: str = "input"
+    return_messages: bool = True
+    max_tokens: int = MAX_TOKENS
+    max_turns: int = MAX_TURNS
+    cart: Any = None
+    turns_seen: int = 0
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def _turns(self):
+        messages = self.chat_memory.messages
+        return [messages[i:i + 2] for i in range(0, len(messages), 2)]
+
+    def window(self):
+        """
+        The messages sent to the LLM: summary first, then the newest turns
+        that fit the budget. The latest turn is always kept.
+        """
+        turns = self._turns()[-self.max_turns:] if self.max_turns else []
+        kept, used = [], 0
+        for turn in reversed(turns):
+            tokens = count_message_tokens(turn)
+            if kept and used + tokens > self.max_tokens:
+                break
+            kept.insert(0, turn)
+            used += tokens
+
+        messages = [message for turn in kept for message in turn]
+        summary = cart_summary(self.cart, self.turns_seen - len(kept))
+        if summary:
+            messages.insert(0, SystemMessage(content=summary))
+        return messages
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        messages = self.window()
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages)}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        self.turns_seen += 1
+        # Only the newest turns can ever be sent, so don't keep the rest
+        messages = self.chat_memory.messages
+        if len(messages) > 2 * self.max_turns:
+            self.chat_memory.messages = messages[-2 * self.max_turns:] if self.max_turns else []
+
+    def clear(self) -> None:
+        super().clear()
+        self.turns_seen = 0
+
@@ -0,0 +1,79 @@
+import hashlib
+import os
+import uuid
+
+ACTIVE_FILE = 'active'
+
+
+class MenuCache:
+    """
+    Parsed menus keyed by the SHA-256 of the uploaded file, stored as CSV.
+
+    Re-uploading a file that has been parsed before skips OCR and LLM
+    extraction, and the last menu set active is restored on startup.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, write):
+        # Write to a temporary name first so a crash never leaves a partial file
+        tmp_path = self._path(f".{name}.{uuid.uuid4().hex}")
+        write(tmp_path)
+        os.replace(tmp_path, self._path(name))
+
+    def get(self, key):
+        """
+        Return the cached menu for `key`, or None if this file has not been parsed.
+        An unreadable or empty cached menu is deleted and counts as a miss.
+        """
+        path = self._path(f"{key}.csv")
+        if not os.path.exists(path):
+            return None
+        import pandas as pd
+        try:
+            menu_df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError):
+            menu_df = None
+        if menu_df is None or menu_df.empty:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return menu_df
+
+    def put(self, key, menu_df):
+        """
+        Cache a parsed menu. Empty menus are not cached, so a failed
+        extraction is retried on the next upload.
+        """
+        if menu_df is None or menu_df.empty:
+            return False
+        self._write(f"{key}.csv", lambda path: menu_df.to_csv(path, index=False))
+        return True
+
+    def set_active(self, key):
+        def write(path):
+            with open(path, 'w') as f:
+                f.write(key)
+        self._write(ACTIVE_FILE, write)
+
+    def load_active(self):
+        """
+        Return the last active menu, or None if there is none.
+        """
+        try:
+            with open(self._path(ACTIVE_FILE)) as f:
+                key = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return self.get(key) if key else None
@@ -0,0 +1,237 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+ARTICLES = {"a", "an", "the", "some"}
+FUZZY_THRESHOLD = 0.8
+RERANK_CANDIDATES = 10
+# Trigrams shared by more items than this ("lat", "ed ") don't narrow the
+# search, so candidates come from the rarer trigrams of the query
+COMMON_GRAM_ITEMS = 200
+
+
+def normalize(text):
+    """
+    Lowercase, strip accents and punctuation, and collapse whitespace.
+    """
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^a-z0-9]+", " ", text.lower())
+    return text.strip()
+
+
+def singular(word):
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def aliases(name):
+    """
+    Spellings of a menu item name that should resolve to it exactly.
+    """
+    words = [w for w in normalize(name).split() if w not in ARTICLES]
+    if not words:
+        return set()
+    variants = {" ".join(words), " ".join(singular(w) for w in words), "".join(words)}
+    return {v for v in variants if v}
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def parse_price(value):
+    """
+    Parse a menu price such as 4.5, "4.50" or "$4.50" into a float, or None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if value != value else float(value)  # NaN check
+    match = re.search(r"\d+(?:\.\d+)?", str(value).replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def _text(value, default=""):
+    if value is None or (isinstance(value, float) and value != value):
+        return default
+    return str(value).strip()
+
+
+class MenuIndex:
+    """
+    Lookup structure over a menu dataframe, built once per menu.
+
+    Exact and alias lookups are dictionary hits; typo-tolerant matching uses a
+    trigram inverted index so only items sharing trigrams with the query are
+    scored. Answer strings for the menu tools are rendered up front.
+    """
+
+    def __init__(self, menu_df=None):
+        self.items = []
+        self.basic_answers = []
+        self.description_answers = []
+        self._names = {}
+        self._normalized = []
+        self._gram_sets = []
+        self._postings = {}
+
+        records = [] if menu_df is None or menu_df.empty else menu_df.to_dict(orient="records")
+        for record in records:
+            name = _text(record.get("item"))
+            if not name:
+                continue
+            self._add(record, name)
+        self._add_short_names()
+
+    def _add(self, record, name):
+        i = len(self.items)
+        price = parse_price(record.get("price"))
+        entry = {
+            "item": name,
+            "price": price,
+            "allergens": _text(record.get("allergens"), "None listed"),
+            "description": _text(record.get("description")),
+        }
+        self.items.append(entry)
+
+        price_text = f"${price:.2f}" if price is not None else "price not listed"
+        basic = f"{name}: {price_text}. Allergens: {entry['allergens']}"
+        self.basic_answers.append(basic)
+        if entry["description"]:
+            self.description_answers.append(f"{name}: {entry['description']}. {price_text}. Allergens: {entry['allergens']}")
+        else:
+            self.description_answers.append(basic)
+
+        # First item wins when two share an alias
+        for alias in aliases(name):
+            self._names.setdefault(alias, i)
+
+        normalized = normalize(name)
+        grams = trigrams(normalized)
+        self._normalized.append(normalized)
+        self._gram_sets.append(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(i)
+
+    def _add_short_names(self):
+        """
+        Let customers drop leading words ("muffin" for "Blueberry Muffin") when
+        the shortened name points at exactly one item.
+        """
+        owners = {}
+        for i, normalized in enumerate(self._normalized):
+            words = [singular(w) for w in normalized.split() if w not in ARTICLES]
+            for start in range(1, len(words)):
+                owners.setdefault(" ".join(words[start:]), set()).add(i)
+        for short, items in owners.items():
+            if len(items) == 1 and short not in self._names:
+                self._names[short] = next(iter(items))
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def empty(self):
+        return not self.items
+
+    def lookup(self, name):
+        """
+        Exact match on the item name or one of its aliases. Returns the item position or None.
+        """
+        for alias in aliases(name):
+            i = self._names.get(alias)
+            if i is not None:
+                return i
+        return None
+
+    def find_mentions(self, text, max_words=6):
+        """
+        Items named exactly (by name or alias) anywhere in `text`.
+
+        Longer matches win, so "iced latte" is found instead of "latte".
+        Returns item positions in order of appearance.
+        """
+        words = [w for w in normalize(text).split() if w not in ARTICLES]
+        found = []
+        start = 0
+        while start < len(words):
+            for length in range(min(max_words, len(words) - start), 0, -1):
+                i = self.lookup(" ".join(words[start:start + length]))
+                if i is not None:
+                    if i not in found:
+                        found.append(i)
+                    start += length
+                    break
+            else:
+                start += 1
+        return found
+
+    def closest(self, name, k=3):
+        """
+        Return up to `k` (position, score) pairs ranked by similarity.
+
+        Candidates are the items sharing one of the query's rarer trigrams,
+        ranked by Dice coefficient over all trigrams, and the best
+        few are re-scored with an edit-based ratio, which handles transposed
+        letters ("ceaser" / "caesar") better than trigrams alone. Trigrams
+        common to more than COMMON_GRAM_ITEMS items are skipped, so the cost
+        doesn't grow with the menu; if every trigram is that common, only the
+        rarest one is used.
+        """
+        normalized = normalize(name)
+        query = trigrams(normalized)
+        postings = sorted((self._postings[gram] for gram in query if gram in self._postings), key=len)
+        rare = [items for items in postings if len(items) <= COMMON_GRAM_ITEMS] or postings[:1]
+        shortlist = set().union(*rare)
+        candidates = sorted(
+            ((i, 2 * len(query & self._gram_sets[i]) / (len(query) + len(self._gram_sets[i]))) for i in shortlist),
+            key=lambda pair: (-pair[1], pair[0]),
+        )[:max(k, RERANK_CANDIDATES)]
+        scored = [
+            (i, max(dice, SequenceMatcher(None, normalized, self._normalized[i]).ratio()))
+            for i, dice in candidates
+        ]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        return scored[:k]
+
+    def match(self, name, threshold=FUZZY_THRESHOLD):
+        """
+        Exact lookup, falling back to the closest fuzzy match above `threshold`.
+        """
+        i = self.lookup(name)
+        if i is not None:
+            return i
+        return self._best(self.closest(name, k=1), threshold)
+
+    @staticmethod
+    def _best(nearest, threshold=FUZZY_THRESHOLD):
+        if nearest and nearest[0][1] >= threshold:
+            return nearest[0][0]
+        return None
+
+    def answer(self, name, include_description=False, k=3):
+        """
+        Pre-rendered answer for `name`. A typo is answered for the closest
+        item, labelled as such so it can be confirmed; a miss lists only the
+        `k` nearest items.
+        """
+        if self.empty:
+            return "No menu available."
+        answers = self.description_answers if include_description else self.basic_answers
+        i = self.lookup(name)
+        if i is not None:
+            return answers[i]
+        scored = self.closest(name, k)
+        i = self._best(scored)
+        if i is not None:
+            return f"'{name}' is not on the menu. Closest match: {answers[i]}"
+        nearest = [answers[j] for j, _ in scored]
+        if not nearest:
+            return f"'{name}' is not on the menu."
+        return f"'{name}' is not on the menu. Closest items:\n" + "\n".join(nearest)
@@ -1,23 +1,43 @@
-from PyPDF2 import PdfReader
-from PIL import Image
-import pytesseract
-import pandas as pd
-from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain.chains import LLMChain
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+import io
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from dotenv import load_dotenv
+from models.clients import chat_model
+from models.menu_index import normalize
+
+# pandas, LangChain, PyPDF2 and the OCR stack are imported when a menu is
+# processed, not when the app starts
 
 load_dotenv()
-# Define the output schema
-response_schemas = [
-    ResponseSchema(name="items", description="A list of dictionaries, each containing 'item', 'description', 'price', and 'allergens' for a menu item"),
-]
-output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
 
-# Create a prompt template
-prompt_template = PromptTemplate(
-    template="""Extract menu information from the following raw text. Identify each menu item, its description, price, and allergens. Return the information as a list of dictionaries.
+# Menus are split into chunks of about this many characters for extraction
+MAX_CHUNK_CHARS = 6000
+MAX_WORKERS = int(os.getenv("MENU_EXTRACTION_WORKERS", 4))
+PAGE_BREAK = "\f"
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def get_menu_chain():
+    """
+    The gpt-3.5-turbo menu extraction chain, built on first use.
+    """
+    from langchain.prompts import PromptTemplate
+    from langchain.chains import LLMChain
+    from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+
+    # Define the output schema
+    response_schemas = [
+        ResponseSchema(name="items", description="A list of dictionaries, each containing 'item', 'description', 'price', and 'allergens' for a menu item"),
+    ]
+    output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+
+    # Create a prompt template
+    prompt_template = PromptTemplate(
+        template="""Extract menu information from the following raw text. Identify each menu item, its description, price, and allergens. Return the information as a list of dictionaries.
 
     {format_instructions}
 
@@ -25,48 +45,159 @@ prompt_template = PromptTemplate(
     {menu_text}
 
     Extracted menu information:""",
-    input_variables=["menu_text"],
-    partial_variables={"format_instructions": output_parser.get_format_instructions()}
-)
+        input_variables=["menu_text"],
+        partial_variables={"format_instructions": output_parser.get_format_instructions()}
+    )
+
+    # Create the menu processing chain on the shared language model client
+    return LLMChain(llm=chat_model("gpt-3.5-turbo", temperature=0), prompt=prompt_template, output_parser=output_parser)
+
+
+def split_menu_text(menu_text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Split menu text into chunks of at most `max_chars`, breaking on pages
+    (form feeds) first and then on blank lines between sections.
+    """
+    sections = []
+    for page in menu_text.split(PAGE_BREAK):
+        if len(page) <= max_chars:
+            sections.append(page)
+            continue
+        for section in page.split("\n\n"):
+            # A single oversized section is cut on line boundaries
+            while len(section) > max_chars:
+                cut = section.rfind("\n", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                sections.append(section[:cut])
+                section = section[cut:]
+            sections.append(section)
+
+    chunks, current = [], []
+    size = 0
+    for section in sections:
+        if not section.strip():
+            continue
+        if current and size + len(section) > max_chars:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(section)
+        size += len(section) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def merge_items(partials):
+    """
+    Merge per-chunk item lists in chunk order, dropping duplicate item names.
+    Fields missing from the first occurrence are filled from later ones.
+    """
+    merged = {}
+    for items in partials:
+        for item in items:
+            key = normalize(item.get('item', ''))
+            if not key:
+                continue
+            if key not in merged:
+                merged[key] = dict(item)
+                continue
+            for field, value in item.items():
+                if value not in (None, "") and merged[key].get(field) in (None, ""):
+                    merged[key][field] = value
+    return list(merged.values())
 
-# Initialize the language model
-llm = ChatOpenAI(temperature=0, model_name="gpt-3.5-turbo")
 
-# Create the menu processing chain
-menu_chain = LLMChain(llm=llm, prompt=prompt_template, output_parser=output_parser)
+def extract_menu(chunks, chain=None, max_workers=MAX_WORKERS, on_progress=None):
+    """
+    Run the extraction chain over `chunks` with a bounded worker pool.
+
+    `chain` is anything with an LLMChain-style `invoke(text)` returning
+    {'text': {'items': [...]}}; it defaults to the gpt-3.5-turbo menu chain.
+    `on_progress(done, total)` is called as chunks finish; if it raises,
+    chunks that have not started are dropped and the error propagates.
+    Returns the merged items and per-chunk timings.
+    """
+    chain = chain or get_menu_chain()
+
+    def run(index, chunk):
+        start = time.perf_counter()
+        result = chain.invoke(chunk)
+        items = result['text']['items']
+        return items, {"chunk": index, "chars": len(chunk), "items": len(items),
+                       "seconds": round(time.perf_counter() - start, 3)}
+
+    results = [None] * len(chunks)
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks) or 1)))
+    try:
+        futures = {pool.submit(run, i, chunk): i for i, chunk in enumerate(chunks)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if on_progress:
+                on_progress(done, len(chunks))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    partials = [items for items, _ in results]
+    timings = [timing for _, timing in results]
+    return merge_items(partials), timings
+
 
 # Function to process the entire menu
-def process_menu(menu_text):
-    result = menu_chain.invoke(menu_text)
-    menu_df = pd.DataFrame(result['text']['items'])
-    menu_df.to_csv('menu.csv', index=False)
+def process_menu(menu_text, chain=None, max_workers=MAX_WORKERS, on_progress=None):
+    import pandas as pd
+
+    start = time.perf_counter()
+    chunks = split_menu_text(menu_text)
+    items, timings = extract_menu(chunks, chain=chain, max_workers=max_workers, on_progress=on_progress)
+    menu_df = pd.DataFrame(items)
+    menu_df.attrs['chunk_timings'] = timings
+    logger.info("Extracted %d menu items from %d chunks in %.2fs: %s",
+                len(menu_df), len(chunks), time.perf_counter() - start, timings)
     return menu_df
 
 
+def process_menu_bytes(data, filename):
+    """Extract text from the raw bytes of an uploaded menu file."""
+    file = io.BytesIO(data)
+    file.filename = filename
+    return process_menu_text(file)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+SUPPORTED_EXTENSIONS = ('.pdf',) + IMAGE_EXTENSIONS + ('.txt',)
+
+def is_supported(filename):
+    return filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
 def process_menu_text(file):
-    if file.filename.endswith('.pdf'):
+    # Extensions are matched case-insensitively, so "MENU.PDF" works too
+    filename = file.filename.lower()
+    if filename.endswith('.pdf'):
         menu_text = process_pdf(file)
-    elif file.filename.endswith(('.png', '.jpg', '.jpeg')):
+    elif filename.endswith(IMAGE_EXTENSIONS):
         menu_text = process_image(file)
-    elif file.filename.endswith('.txt'):
+    elif filename.endswith('.txt'):
         menu_text = process_text(file)
     else:
         return None, False
     return menu_text, True
 
 def process_pdf(file):
-    """Extract text from a PDF menu."""
-    reader = PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
+    """Extract text from a PDF menu, OCR'ing scanned pages."""
+    from PyPDF2 import PdfReader
+    from models.ocr import pdf_pages_text
+
+    data = file.read()
+    reader = PdfReader(io.BytesIO(data))
+    # Keep page boundaries so large menus can be split by page
+    return PAGE_BREAK.join(pdf_pages_text(reader, data))
 
 def process_image(file):
     """Extract text from an image menu using OCR."""
+    from PIL import Image
+    from models.ocr import ocr_images
+
     image = Image.open(file)
-    text = pytesseract.image_to_string(image)
-    return text
+    return ocr_images([image])[0]
 
 def process_text(file):
     """Extract text from a .txt menu."""
@@ -0,0 +1,217 @@
+import bisect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# In-process metrics in the Prometheus text format, served at /metrics, and
+# sampled per-request traces logged as one JSON line each. Sampling is off
+# unless TRACE_SAMPLE_RATE is set, and can be changed at runtime.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TRACE_FIELD_CHARS = 200  # Tool inputs and outputs are cut to this length in traces
+
+trace_logger = logging.getLogger("models.metrics.traces")
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+            lines.extend(line for key, value in items for line in self.samples(key, value))
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self, key, value):
+        yield f"{self.name}{format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                # One count per bucket plus +Inf, then the sum
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self, key, counts):
+        cumulative = 0
+        names = self.labelnames + ("le",)
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += count
+            yield f"{self.name}_bucket{format_labels(names, key + (bound,))} {cumulative}"
+        yield f"{self.name}_sum{format_labels(self.labelnames, key)} {round(counts[-1], 6)}"
+        yield f"{self.name}_count{format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, description, labelnames=()):
+        metric = Counter(name, description, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, description, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram(
+    "cashier_stage_seconds", "Time spent in each stage of a request.", ("operation", "stage"))
+llm_seconds = registry.histogram(
+    "cashier_llm_seconds", "Duration of chat model calls.", ("model",))
+llm_tokens = registry.counter(
+    "cashier_llm_tokens_total", "Tokens sent to and generated by chat models.", ("model", "kind"))
+llm_errors = registry.counter(
+    "cashier_llm_errors_total", "Chat model calls that failed.", ("model",))
+tool_seconds = registry.histogram(
+    "cashier_tool_seconds", "Duration of agent tool calls.", ("tool",))
+tool_errors = registry.counter(
+    "cashier_tool_errors_total", "Agent tool calls that raised.", ("tool",))
+traces_sampled = registry.counter(
+    "cashier_traces_sampled_total", "Requests whose trace was logged.", ("operation",))
+orders_placed = registry.counter(
+    "cashier_orders_placed_total", "Carts turned into orders.")
+conversations_reset = registry.counter(
+    "cashier_conversations_reset_total", "Conversations cleared, at checkout or on request.")
+jobs_failed = registry.counter(
+    "cashier_jobs_failed_total", "Background jobs that raised.", ("kind",))
+
+_sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+
+
+def trace_sample_rate():
+    return _sample_rate
+
+
+def set_trace_sample_rate(rate):
+    """
+    Print traces for this share of requests from now on (0 turns tracing off).
+    """
+    global _sample_rate
+    _sample_rate = min(1.0, max(0.0, float(rate)))
+    return _sample_rate
+
+
+@contextmanager
+def span(operation, stage):
+    """
+    Time a stage that is not part of a traced request.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, operation=operation, stage=stage)
+
+
+class Trace:
+    """
+    The stages of one request. Every span feeds cashier_stage_seconds; sampled
+    traces also keep their spans and LangChain events and log them on finish.
+    """
+
+    def __init__(self, operation, sampled=None):
+        self.operation = operation
+        self.sampled = random.random() < _sample_rate if sampled is None else sampled
+        self.start = time.perf_counter()
+        self.events = []
+        self.lock = threading.Lock()
+        self.finished = False
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, start)
+
+    def observe(self, stage, seconds, start=None):
+        stage_seconds.observe(seconds, operation=self.operation, stage=stage)
+        if self.sampled:
+            start = time.perf_counter() - seconds if start is None else start
+            self.event("span", stage=stage, start_ms=self.ms(start - self.start), ms=self.ms(seconds))
+
+    def event(self, kind, **fields):
+        if not self.sampled:
+            return
+        for name, value in fields.items():
+            if isinstance(value, str) and len(value) > TRACE_FIELD_CHARS:
+                fields[name] = value[:TRACE_FIELD_CHARS] + "..."
+        with self.lock:
+            self.events.append(dict(event=kind, at_ms=self.ms(time.perf_counter() - self.start), **fields))
+
+    def finish(self, **fields):
+        """
+        Record the total time and log the trace if sampled. Only the first call counts.
+        """
+        with self.lock:
+            if self.finished:
+                return
+            self.finished = True
+        total = self.elapsed()
+        stage_seconds.observe(total, operation=self.operation, stage="total")
+        if self.sampled:
+            traces_sampled.inc(operation=self.operation)
+            trace_logger.info(json.dumps(dict(trace=self.operation, total_ms=self.ms(total), events=self.events,
+                                              **fields), default=str))
+
+    @staticmethod
+    def ms(seconds):
+        return round(1000 * seconds, 1)
@@ -0,0 +1,189 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pytesseract
+from PIL import Image, ImageOps
+
+MAX_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 2))
+MAX_SIDE = 2000        # Longest side after downscaling, in pixels
+TILE_HEIGHT = 1000     # Tall images are OCR'd in bands of about this height
+MIN_PAGE_TEXT = 20     # PDF pages with less extractable text are treated as scanned
+
+
+def otsu_threshold(gray):
+    """
+    Threshold that best separates dark and light pixels (Otsu's method).
+    """
+    histogram = np.bincount(np.asarray(gray).ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    levels = np.arange(256)
+    weight_dark = np.cumsum(histogram)
+    weight_light = total - weight_dark
+    sum_dark = np.cumsum(histogram * levels)
+    mean_dark = sum_dark / np.maximum(weight_dark, 1)
+    mean_light = (sum_dark[-1] - sum_dark) / np.maximum(weight_light, 1)
+    between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    return int(np.argmax(between))
+
+
+def preprocess(image, max_side=MAX_SIDE):
+    """
+    Downscale, grayscale and binarize an image before OCR.
+    """
+    image = ImageOps.exif_transpose(image)
+    gray = image.convert("L")
+    if max(gray.size) > max_side:
+        gray.thumbnail((max_side, max_side), Image.LANCZOS)
+    threshold = otsu_threshold(gray)
+    return gray.point(lambda p: 255 if p > threshold else 0)
+
+
+def split_bands(image, tile_height=TILE_HEIGHT):
+    """
+    Split a binarized image into horizontal bands, cutting on blank rows so
+    no line of text is split between bands.
+    """
+    width, height = image.size
+    if height <= tile_height * 1.5:
+        return [image]
+    # Rows with no dark pixels are safe places to cut
+    blank = (np.asarray(image) > 0).all(axis=1)
+    bands, top = [], 0
+    while height - top > tile_height * 1.5:
+        target = top + tile_height
+        window = blank[target - tile_height // 4:target + tile_height // 4]
+        candidates = np.flatnonzero(window)
+        if len(candidates):
+            offset = candidates[np.argmin(np.abs(candidates - tile_height // 4))]
+            cut = target - tile_height // 4 + int(offset)
+        else:
+            cut = target
+        bands.append(image.crop((0, top, width, cut)))
+        top = cut
+    bands.append(image.crop((0, top, width, height)))
+    return bands
+
+
+# Tesseract runs as a subprocess per call, so a thread pool gives one
+# tesseract process per worker. While a pool is running each one is kept
+# single-threaded so parallel calls don't oversubscribe the CPU. The limit is
+# only set if the environment doesn't already choose one.
+_thread_limit_lock = threading.Lock()
+_thread_limit_users = 0
+_thread_limit_set = False
+
+
+@contextmanager
+def single_threaded_tesseract():
+    global _thread_limit_users, _thread_limit_set
+    with _thread_limit_lock:
+        if _thread_limit_users == 0 and "OMP_THREAD_LIMIT" not in os.environ:
+            os.environ["OMP_THREAD_LIMIT"] = "1"
+            _thread_limit_set = True
+        _thread_limit_users += 1
+    try:
+        yield
+    finally:
+        with _thread_limit_lock:
+            _thread_limit_users -= 1
+            if _thread_limit_users == 0 and _thread_limit_set:
+                os.environ.pop("OMP_THREAD_LIMIT", None)
+                _thread_limit_set = False
+
+
+def _ocr(image):
+    return pytesseract.image_to_string(image)
+
+
+def ocr_images(images, max_workers=MAX_WORKERS):
+    """
+    OCR a list of images in parallel and return one string per image, in order.
+    Each image is preprocessed and split into bands; bands are OCR'd concurrently.
+    """
+    tiles, owners = [], []
+    for i, image in enumerate(images):
+        for band in split_bands(preprocess(image)):
+            tiles.append(band)
+            owners.append(i)
+    if not tiles:
+        return ["" for _ in images]
+
+    with single_threaded_tesseract(), \
+            ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tiles)))) as pool:
+        texts = list(pool.map(_ocr, tiles))
+
+    pages = [[] for _ in images]
+    for i, text in zip(owners, texts):
+        pages[i].append(text.strip())
+    return ["\n".join(part for part in parts if part) for parts in pages]
+
+
+def page_images(page):
+    """
+    Images embedded in a PDF page; for scanned menus this is the page scan.
+    """
+    try:
+        files = page.images
+    except (KeyError, NotImplementedError, ValueError):
+        return []
+    images = []
+    for file in files:
+        try:
+            images.append(Image.open(io.BytesIO(file.data)))
+        except Exception:
+            continue
+    return images
+
+
+def rasterize_pages(data, page_numbers):
+    """
+    Render PDF pages to images with pdf2image (poppler), if it is installed.
+    Used for text-less pages whose scans cannot be extracted directly. Pages
+    poppler can't render are left out, as if it were not installed.
+    """
+    try:
+        from pdf2image import convert_from_bytes
+        from pdf2image.exceptions import PDFInfoNotInstalledError, PDFPageCountError, PDFSyntaxError
+    except ImportError:
+        return {}
+    rendered = {}
+    for number in page_numbers:
+        try:
+            pages = convert_from_bytes(data, dpi=200, first_page=number + 1, last_page=number + 1, grayscale=True)
+        except PDFInfoNotInstalledError:
+            # No poppler binaries on PATH; no other page will render either
+            break
+        except (PDFPageCountError, PDFSyntaxError):
+            continue
+        if pages:
+            rendered[number] = pages
+    return rendered
+
+
+def pdf_pages_text(reader, data=None, max_workers=MAX_WORKERS):
+    """
+    Text for each page of a PDF. Pages without extractable text are OCR'd from
+    their embedded images, falling back to rasterizing the page.
+    """
+    texts = [page.extract_text() or "" for page in reader.pages]
+    scanned = [i for i, text in enumerate(texts) if len(text.strip()) < MIN_PAGE_TEXT]
+    if not scanned:
+        return texts
+
+    images = {i: page_images(reader.pages[i]) for i in scanned}
+    missing = [i for i in scanned if not images[i]]
+    if missing and data is not None:
+        images.update(rasterize_pages(data, missing))
+
+    flat, owners = [], []
+    for i in scanned:
+        for image in images.get(i, []):
+            flat.append(image)
+            owners.append(i)
+    for i, text in zip(owners, ocr_images(flat, max_workers)):
+        texts[i] = "\n".join(part for part in (texts[i].strip(), text) if part)
+    return texts
@@ -0,0 +1,169 @@
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    customer_name TEXT NOT NULL DEFAULT '',
+    items TEXT NOT NULL DEFAULT '',
+    customizations TEXT NOT NULL DEFAULT '',
+    price_per_item REAL NOT NULL DEFAULT 0,
+    order_total REAL NOT NULL DEFAULT 0,
+    lines TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS orders_created_at ON orders (created_at);
+CREATE INDEX IF NOT EXISTS orders_customer ON orders (customer_name COLLATE NOCASE, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+COLUMNS = ["id", "created_at", "customer_name", "items", "customizations", "price_per_item", "order_total", "lines"]
+MAX_PAGE = 1000
+
+
+class OrderStore:
+    """
+    Durable, append-only order log backed by SQLite in WAL mode.
+
+    Each order is a single-row insert, so placing an order costs the same no
+    matter how many came before. Order ids double as pagination cursors.
+    Resetting the dashboard only moves the board start; history is kept.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'board_start'").fetchone()
+        self._board_start = int(row[0]) if row else 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _record(row):
+        record = dict(zip(COLUMNS, row))
+        record["lines"] = json.loads(record["lines"])
+        return record
+
+    def append(self, order, created_at=None):
+        """
+        Store an OrderEntry and return it as a record with its id and timestamp.
+        """
+        created_at = time.time() if created_at is None else created_at
+        lines = json.dumps([line.model_dump() for line in order.lines])
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO orders (created_at, customer_name, items, customizations, price_per_item, order_total, lines)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (created_at, order.customer_name, order.items, order.customizations,
+                 order.price_per_item, order.order_total, lines),
+            )
+            self._conn.commit()
+            order_id = cursor.lastrowid
+        return {
+            "id": order_id,
+            "created_at": created_at,
+            "customer_name": order.customer_name,
+            "items": order.items,
+            "customizations": order.customizations,
+            "price_per_item": order.price_per_item,
+            "order_total": order.order_total,
+            "lines": json.loads(lines),
+        }
+
+    def board_start(self):
+        """
+        Id of the last order cleared from the dashboard (0 if never reset).
+        """
+        return self._board_start
+
+    def reset_board(self):
+        """
+        Hide every order placed so far from the dashboard. Returns the new cursor.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('board_start', ?)"
+                " ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (str(row[0]),),
+            )
+            self._conn.commit()
+            self._board_start = row[0]
+        return row[0]
+
+    def query(self, since=None, limit=100, customer=None, start=None, end=None):
+        """
+        Orders with id greater than `since`, oldest first, optionally filtered by
+        customer name and a [start, end) time range.
+        """
+        limit = max(1, int(limit))
+        clauses, params = ["id > ?"], [since or 0]
+        if customer:
+            clauses.append("customer_name = ? COLLATE NOCASE")
+            params.append(customer)
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(end)
+        # Walk the time index for range queries; ids and timestamps rise together
+        order_by = "created_at, id" if start is not None or end is not None else "id"
+        sql = f"SELECT {', '.join(COLUMNS)} FROM orders WHERE {' AND '.join(clauses)} ORDER BY {order_by} LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        return [self._record(row) for row in rows]
+
+    def page(self, since=None, limit=100, **filters):
+        """
+        A page of dashboard orders plus the cursor to resume from.
+        """
+        since = max(int(since or 0), self.board_start())
+        limit = max(1, min(int(limit), MAX_PAGE))
+        # Fetch one extra row to know whether another page follows
+        orders = self.query(since=since, limit=limit + 1, **filters)
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+        cursor = orders[-1]["id"] if orders else since
+        return {"orders": orders, "cursor": cursor, "has_more": has_more}
+
+    def last_id(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM orders").fetchone()[0]
+
+    def frames(self, through=None, chunk_size=50000):
+        """
+        Every order up to id `through` as pandas DataFrames of `chunk_size`
+        rows, oldest first. `lines` is left as JSON text. The store is only
+        locked while each chunk is read.
+        """
+        import pandas as pd
+
+        through = self.last_id() if through is None else through
+        since = 0
+        while since < through:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM orders WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                    (since, through, chunk_size),
+                ).fetchall()
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=COLUMNS)
+            since = rows[-1][0]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
@@ -0,0 +1,133 @@
+import os
+import queue
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.getenv("PIPELINE_TTS_WORKERS", 3))
+MIN_CLAUSE_CHARS = 40  # Long sentences are also cut at a comma or semicolon past this length
+
+# Sentence end: terminal punctuation (plus closing quotes) followed by whitespace,
+# so prices like "$4.50" are never split
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+CLAUSE_END = re.compile(r"[,;:]\s+")
+
+
+class SentenceSplitter:
+    """
+    Turns a stream of LLM tokens into speakable segments: whole sentences,
+    or clauses once a sentence runs long.
+    """
+
+    def __init__(self, min_clause_chars=MIN_CLAUSE_CHARS):
+        self.min_clause_chars = min_clause_chars
+        self.buffer = ""
+
+    def _cut(self):
+        match = SENTENCE_END.search(self.buffer)
+        if match is None and len(self.buffer) > self.min_clause_chars:
+            match = CLAUSE_END.search(self.buffer, self.min_clause_chars)
+        if match is None:
+            return None
+        segment, self.buffer = self.buffer[:match.end()].strip(), self.buffer[match.end():]
+        return segment
+
+    def feed(self, text):
+        """
+        Add text and return the segments it completed.
+        """
+        self.buffer += text
+        segments = []
+        segment = self._cut()
+        while segment is not None:
+            if segment:
+                segments.append(segment)
+            segment = self._cut()
+        return segments
+
+    def flush(self):
+        segment, self.buffer = self.buffer.strip(), ""
+        return segment or None
+
+    def reset(self):
+        self.buffer = ""
+
+
+def speak_pipelined(respond, synthesize, max_workers=MAX_WORKERS):
+    """
+    Overlap generating a reply with synthesizing it.
+
+    `respond(on_token)` produces the reply, reporting tokens as they are
+    generated (see TokenStreamHandler in models/callbacks.py), and returns the
+    full text; it runs on its own thread. Each completed segment goes straight
+    to `synthesize(text)` on a worker pool. Yields ("segment", index, text, audio) in reply order as
+    audio becomes ready, then ("done", full_text).
+
+    If no tokens were streamed for the final generation (the fast path, or a
+    model that doesn't stream), the returned text is split instead.
+
+    A model call that ends in a tool call may stream some text first ("Let
+    me check that."). Segments of it that were already sent to synthesis are
+    spoken; the rest is dropped. So that the text matches what was heard,
+    the spoken part is prepended to the full text in the "done" event.
+    """
+    events = queue.Queue()
+
+    def run():
+        try:
+            events.put(("done", respond(lambda token: events.put(("token", token)))))
+        except Exception as e:
+            events.put(("error", e))
+
+    threading.Thread(target=run, daemon=True).start()
+
+    splitter = SentenceSplitter()
+    streamed = False
+    pending = deque()
+    index = 0
+    spoken = []     # Segments submitted for the current model call
+    preamble = []   # Segments spoken from earlier calls of this reply
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts") as pool:
+        def submit(segments):
+            for segment in segments:
+                future = pool.submit(synthesize, segment)
+                # Wake the loop below when the audio is ready
+                future.add_done_callback(lambda _: events.put(("audio", None)))
+                pending.append((segment, future))
+
+        while True:
+            kind, value = events.get()
+            if kind == "token":
+                if value is None:
+                    # A new model call; text not yet spoken from the last one was not the answer
+                    splitter.reset()
+                    streamed = False
+                    preamble.extend(spoken)
+                    spoken = []
+                else:
+                    streamed = True
+                    segments = splitter.feed(value)
+                    spoken.extend(segments)
+                    submit(segments)
+            elif kind == "error":
+                raise value
+            elif kind == "done":
+                if not streamed:
+                    splitter.reset()
+                    submit(splitter.feed(value))
+                submit([segment for segment in [splitter.flush()] if segment])
+                if preamble:
+                    value = " ".join(preamble + [value])
+                break
+
+            while pending and pending[0][1].done():
+                segment, future = pending.popleft()
+                yield "segment", index, segment, future.result()
+                index += 1
+
+        while pending:
+            segment, future = pending.popleft()
+            yield "segment", index, segment, future.result()
+            index += 1
+    yield "done", value
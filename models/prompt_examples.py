@@ -0,0 +1,76 @@
+import os
+
+from models.text_vectors import TfidfIndex
+
+FEW_SHOT_K = int(os.getenv("FEW_SHOT_K", 4))
+
+# Few-shot examples for the cashier agent: the tool to choose (if any) and
+# the style of reply. Only the ones closest to the customer's words are sent.
+EXAMPLES = [
+    {"input": "How much is the Latte?", "tool": "MenuPriceAllergenBasic", "response": "$4.50."},
+    {"input": "What's in the Mocha?", "tool": "MenuDescription", "response": "Espresso, steamed milk, chocolate syrup."},
+    {"input": "Can I get a large size?", "tool": "MenuPriceAllergenBasic", "response": "Sure!"},
+    {"input": "Can I get a Ceaser Salad?", "tool": "AddToCart", "response": "Yes, it's $8.50."},
+    {"input": "How long will my Cappuccino take?", "tool": "MenuPriceAllergenBasic", "response": "About 5 minutes."},
+    {"input": "Can I get almond milk?", "tool": None, "response": "Sure, we have that!"},
+    {"input": "Can I make my order to-go?", "tool": None, "response": "Of course, to-go it is!"},
+    {"input": "What's the price of the Iced Coffee?", "tool": "MenuPriceAllergenBasic", "response": "$3.50."},
+    {"input": "What size can I get the Latte in?", "tool": "MenuPriceAllergenBasic", "response": "Small, medium, or large?"},
+    {"input": "What's in the Turkey Sandwich?", "tool": "MenuDescription", "response": "Turkey, lettuce, tomato, mayo."},
+    {"input": "Do you have oat milk?", "tool": None, "response": "Yep, we do!"},
+    {"input": "Can I pay with cash?", "tool": None, "response": "Sure, cash works."},
+    {"input": "Do you have gluten-free options?", "tool": "MenuPriceAllergenBasic", "response": "Yes, we do!"},
+    {"input": "What's the total for a large latte and a muffin?", "tool": "MenuPriceAllergenBasic", "response": "That'll be $8.25."},
+    {"input": "Do you have soy milk?", "tool": None, "response": "Yes, we have soy milk as a substitute."},
+    {"input": "I'm allergic to nuts. Is the almond croissant safe for me?", "tool": "MenuPriceAllergenBasic", "response": "The almond croissant contains nuts."},
+    {"input": "Can you make the sandwich gluten-free?", "tool": "UpdateCartItem", "response": "We can substitute gluten-free bread for you."},
+    {"input": "Is the Caesar salad dressing dairy-free?", "tool": "MenuPriceAllergenBasic", "response": "The dressing contains dairy."},
+    {"input": "Can I get extra syrup in my drink?", "tool": "UpdateCartItem", "response": "Yes, we can add extra syrup for $0.50."},
+    {"input": "Does the muffin have any eggs in it?", "tool": "MenuPriceAllergenBasic", "response": "Yes, the muffin contains eggs."},
+    {"input": "Can I swap bacon for avocado in my sandwich?", "tool": "UpdateCartItem", "response": "We can do that for an additional $1."},
+    {"input": "I'm vegan. Is the soup vegan-friendly?", "tool": "MenuPriceAllergenBasic", "response": "The soup isn't vegan. Let me call the manager to assist with other choices."},
+    {"input": "Can you tell me about the Chai Latte?", "tool": "MenuDescription", "response": "Spiced black tea with steamed milk."},
+    {"input": "Does the iced tea have caffeine?", "tool": "MenuDescription", "response": "Yes, it has a mild amount of caffeine."},
+    {"input": "Can you make the salad without croutons?", "tool": "UpdateCartItem", "response": "Yes, we can remove the croutons for you."},
+    {"input": "Actually, take off the muffin.", "tool": "RemoveFromCart", "response": "Done, no muffin."},
+    {"input": "It's for Sam.", "tool": "SetCustomerName", "response": "Thanks, Sam!"},
+    {"input": "What's my total?", "tool": "ViewCart", "response": "That's $12.75."},
+]
+
+
+def render_example(example):
+    line = f"- user input: \"{example['input']}\""
+    if example.get("tool"):
+        line += f" Choose tool: {example['tool']}."
+    return line + f" AI response: \"{example['response']}\""
+
+
+def render_examples(examples):
+    return "Examples:\n" + "\n".join(render_example(example) for example in examples)
+
+
+class ExampleSelector:
+    """
+    Picks the few-shot examples most similar to the customer's words.
+
+    When fewer than `k` examples share any words with the input, the first
+    examples fill the remaining slots so the reply style is always shown.
+    """
+
+    def __init__(self, examples=EXAMPLES, k=FEW_SHOT_K):
+        self.examples = examples
+        self.k = k
+        self.index = TfidfIndex([example["input"] for example in examples])
+
+    def select(self, text, k=None):
+        k = self.k if k is None else k
+        chosen = [i for _, i in self.index.search(text, k)]
+        for i in range(len(self.examples)):
+            if len(chosen) >= k:
+                break
+            if i not in chosen:
+                chosen.append(i)
+        return [self.examples[i] for i in chosen]
+
+    def render(self, text, k=None):
+        return render_examples(self.select(text, k))
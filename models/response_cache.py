@@ -0,0 +1,172 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from models.fast_path import ORDER_PATTERN
+from models.menu_index import normalize, singular
+from models.prompt_examples import EXAMPLES
+from models.text_vectors import TfidfIndex
+
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", 512))
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", 3600))
+SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", 0.8))
+
+# Only questions are cached, and only if they cannot refer to the customer's order
+QUESTION_PATTERN = re.compile(
+    r"^\s*(do|does|is|are|can you|could you|what|which|how|when|where|any|have you)\b|\?\s*$"
+)
+CONTEXT_PATTERN = re.compile(
+    r"\b(my|me|mine|it|its|that|this|those|these|them|one|order|total|cart|bill|name|also|too|instead|"
+    r"same|again|else|more|another)\b"
+)
+# Words that don't change what a question asks for
+FILLER_WORDS = {
+    "a", "an", "the", "some", "any", "do", "doe", "does", "is", "are", "there", "you", "your", "have", "ha",
+    "got", "we", "i", "can", "could", "please", "hi", "hey", "um", "so", "of", "for", "to", "on", "at", "be",
+    "serve", "sell", "offer", "carry", "guy", "here", "today",
+}
+
+# Tools whose results only depend on the menu
+MENU_TOOLS = {"MenuPriceAllergenBasic", "MenuDescription"}
+
+
+def content_words(text):
+    """
+    The words of an utterance that carry its meaning, so "do you have oat
+    milk" and "is there oat milk?" both become "oat milk".
+    """
+    return " ".join(word for word in (singular(w) for w in normalize(text).split()) if word not in FILLER_WORDS)
+
+
+class ResponseCache:
+    """
+    Replies to context-free questions about the current menu, reused for the
+    same question asked again in other words.
+
+    Utterances are compared by TF-IDF cosine over their content words; the
+    most similar cached question above `threshold` answers. Only cached
+    questions sharing a term with the utterance are scored, found through an
+    inverted index from terms to cached questions. Entries belong to
+    one menu version and are dropped when the menu changes; otherwise they
+    expire after `ttl` seconds or by least-recent use.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, threshold=SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        # Words common in the few-shot inputs ("latte", "get") weigh less than rare ones
+        self.vectorizer = TfidfIndex([content_words(example["input"]) for example in EXAMPLES])
+        self.version = 0
+        self._entries = OrderedDict()  # content words -> entry, least recently used first
+        self._postings = {}  # term -> content words of the entries whose vector has it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def cacheable(user_input):
+        """
+        Whether the answer to `user_input` can be shared between customers.
+        """
+        text = user_input.lower()
+        return (
+            bool(QUESTION_PATTERN.search(text))
+            and not ORDER_PATTERN.search(text)
+            and not CONTEXT_PATTERN.search(text)
+            and bool(content_words(text))
+        )
+
+    def _expired(self, entry, now):
+        return now - entry["created"] > self.ttl
+
+    def get(self, user_input, version):
+        """
+        The cached reply for `user_input` on menu `version`, or None.
+        """
+        start = time.perf_counter()
+        key = content_words(user_input)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key) if version == self.version else None
+            if entry is None and version == self.version and self._entries:
+                vector = self.vectorizer.vector(key)
+                candidates = set().union(*(self._postings.get(term, ()) for term in vector))
+                best_score = self.threshold
+                for candidate_key in candidates:
+                    candidate = self._entries[candidate_key]
+                    score = TfidfIndex.similarity(vector, candidate["vector"])
+                    if score > best_score or (score == best_score and entry is None):
+                        key, entry, best_score = candidate_key, candidate, score
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += max(0.0, entry["cost"] - (time.perf_counter() - start))
+            return entry["response"]
+
+    def put(self, user_input, response, version, cost):
+        """
+        Cache `response`, which took `cost` seconds to produce on menu `version`.
+        """
+        key = content_words(user_input)
+        entry = {"vector": self.vectorizer.vector(key), "response": response,
+                 "cost": cost, "created": time.monotonic()}
+        with self._lock:
+            if version != self.version:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            for term in entry["vector"]:
+                self._postings.setdefault(term, set()).add(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        for term in entry["vector"]:
+            keys = self._postings[term]
+            keys.discard(key)
+            if not keys:
+                del self._postings[term]
+
+    def invalidate(self, version):
+        """
+        Drop every reply; only replies for menu `version` are accepted from now on.
+        """
+        with self._lock:
+            self.version = version
+            self._entries.clear()
+            self._postings.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "menu_version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                # Agent time the hits would have taken, less the lookups themselves
+                "saved_seconds": round(self.saved_seconds, 3),
+                "saved_ms_per_hit": round(1000 * self.saved_seconds / self.hits, 1) if self.hits else 0.0,
+            }
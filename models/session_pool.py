@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionPool:
+    """
+    Bounded pool of per-customer dialogue sessions.
+
+    Sessions are kept in least-recently-used order. When the pool is full the
+    oldest session is evicted, and sessions that have been idle for longer than
+    `idle_timeout` seconds are dropped on the next access.
+    """
+
+    def __init__(self, factory, max_sessions=512, idle_timeout=900):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.hits = 0
+        self.evicted_lru = 0
+        self.evicted_idle = 0
+
+    def get(self, session_id):
+        """
+        Return the session for `session_id`, creating it if needed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self.hits += 1
+            else:
+                session = self.factory(session_id)
+                self._sessions[session_id] = session
+                self.created += 1
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted_lru += 1
+            session.last_used = now
+            return session
+
+    def discard(self, session_id):
+        """
+        Drop a finished session, e.g. once its order is placed.
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict_idle(self, now):
+        # Sessions are ordered by last use, so idle ones are always at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self.idle_timeout:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted_idle += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "occupancy": len(self._sessions),
+                "capacity": self.max_sessions,
+                "idle_timeout": self.idle_timeout,
+                "created": self.created,
+                "hits": self.hits,
+                "evicted_lru": self.evicted_lru,
+                "evicted_idle": self.evicted_idle,
+            }
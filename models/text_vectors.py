@@ -0,0 +1,58 @@
+import math
+from collections import Counter
+
+from models.menu_index import normalize, singular
+
+
+def tokenize(text):
+    """
+    Normalized, singularized words plus adjacent word pairs.
+    """
+    words = [singular(word) for word in normalize(text).split()]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class TfidfIndex:
+    """
+    TF-IDF vectors over a fixed set of short documents, with cosine search.
+    Pure Python and local: documents here are utterances and menu questions,
+    so a sparse dict per document is all that is needed.
+    """
+
+    def __init__(self, documents):
+        counts = [Counter(tokenize(document)) for document in documents]
+        df = Counter(term for count in counts for term in count)
+        n = len(documents)
+        # Smoothed idf; terms never seen in the documents get the maximum weight
+        self.idf = {term: math.log((1 + n) / (1 + freq)) + 1 for term, freq in df.items()}
+        self.default_idf = math.log(1 + n) + 1
+        self.vectors = [self._weigh(count) for count in counts]
+        self.postings = {}
+        for i, vector in enumerate(self.vectors):
+            for term in vector:
+                self.postings.setdefault(term, []).append(i)
+
+    def _weigh(self, count):
+        vector = {term: (1 + math.log(tf)) * self.idf.get(term, self.default_idf) for term, tf in count.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+        return {term: w / norm for term, w in vector.items()}
+
+    def vector(self, text):
+        return self._weigh(Counter(tokenize(text)))
+
+    @staticmethod
+    def similarity(a, b):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(w * b.get(term, 0.0) for term, w in a.items())
+
+    def search(self, text, k=5):
+        """
+        The `k` most similar documents as (score, index), best first.
+        """
+        query = self.vector(text)
+        scores = Counter()
+        for term, weight in query.items():
+            for i in self.postings.get(term, ()):
+                scores[i] += weight * self.vectors[i][term]
+        return [(score, i) for i, score in scores.most_common(k)]
@@ -1,63 +1,129 @@
-from cartesia import Cartesia
-from pydub import AudioSegment
-import io
-import numpy as np
+import base64
+import json
 import os
 from dotenv import load_dotenv
+from models.audio import AUDIO_FORMATS, SAMPLE_RATE, PCMBuffer, encode_audio, wav_header
+from models.clients import http_session, voice_embedding
+from models.metrics import span
+from models.tts_cache import PhraseCache
 
 load_dotenv()
-# Cartesia setup
-cartesia_client = Cartesia(api_key=os.getenv("CARTESIA_API_KEY"))
+# Cartesia setup; the voice embedding is fetched on first use and cached on disk
+CARTESIA_URL = os.getenv("CARTESIA_BASE_URL", "https://api.cartesia.ai").rstrip("/")
+CARTESIA_VERSION = "2024-06-10"
+CARTESIA_TIMEOUT = 30
 voice_name = "Sarah"
 voice_id = "694f9389-aac1-45b6-b726-9d9369183238"
-voice = cartesia_client.voices.get(id=voice_id)
 model_id = "sonic-english"
 output_format = {
     "container": "raw",
     "encoding": "pcm_f32le",  # 32-bit floating-point PCM
-    "sample_rate": 44100,
+    "sample_rate": SAMPLE_RATE,
 }
 
-def text_to_speech(text):
-    audio_buffer = io.BytesIO()
-
-    # Generate and stream audio
-    for output in cartesia_client.tts.sse(
-        model_id=model_id,
-        transcript=text,
-        voice_embedding=voice["embedding"],
-        stream=True,
-        output_format=output_format,
-    ):
-        buffer = output["audio"]
-        audio_buffer.write(buffer)
-
-    audio_buffer.seek(0)
-
-    # Read raw PCM data from buffer (32-bit float)
-    raw_audio_data = np.frombuffer(audio_buffer.read(), dtype=np.float32)
-
-    # Convert 32-bit float PCM to 16-bit integer PCM
-    int_audio_data = np.int16(raw_audio_data * 32767)  # Scale float32 to int16 range
-
-    # Create a new BytesIO buffer to store the 16-bit PCM data
-    pcm_16bit_buffer = io.BytesIO()
-    pcm_16bit_buffer.write(int_audio_data.tobytes())
-    pcm_16bit_buffer.seek(0)
-
-    # Convert the 16-bit PCM data to a pydub AudioSegment
-    audio_segment = AudioSegment.from_raw(
-        pcm_16bit_buffer,
-        frame_rate=44100,
-        sample_width=2,  # 16-bit PCM (2 bytes per sample)
-        channels=1,      # Mono
-    )
-
-    # Define the output MP3 path
-    audio_filename = 'response.mp3'
-    audio_path = os.path.join('static', audio_filename)
-
-    # Export to MP3 format
-    audio_segment.export(audio_path, format="mp3")
-
-    return audio_filename
\ No newline at end of file
+# Encoding for text_to_speech: "wav" and "pcm" need no encoder, "mp3"/"opus" save bandwidth
+AUDIO_FORMAT = os.getenv("TTS_AUDIO_FORMAT", "mp3")
+# Pipelined replies are synthesized a sentence at a time; encoding each one to
+# mp3 would start an ffmpeg process per sentence, so segments default to WAV
+SEGMENT_AUDIO_FORMAT = os.getenv("TTS_SEGMENT_AUDIO_FORMAT", "wav")
+
+# Synthesized audio is cached under static/ so it can be served directly
+CACHE_URL_DIR = 'tts_cache'
+phrase_cache = PhraseCache(
+    os.path.join('static', CACHE_URL_DIR),
+    max_disk_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+    max_memory_bytes=int(os.getenv("TTS_CACHE_MEMORY_BYTES", 16 * 1024 * 1024)),
+)
+
+
+def audio_chunks(text):
+    """
+    Yield raw 32-bit float PCM chunks from the Cartesia SSE stream as they arrive.
+    Requests go through the shared connection pool instead of a new
+    connection per phrase.
+    """
+    body = {
+        "model_id": model_id,
+        "transcript": text,
+        "voice": {"embedding": voice_embedding(voice_id)},
+        "output_format": output_format,
+        "language": None,
+    }
+    headers = {
+        "X-API-Key": os.getenv("CARTESIA_API_KEY", ""),
+        "Cartesia-Version": CARTESIA_VERSION,
+        "Content-Type": "application/json",
+    }
+    with http_session().post(f"{CARTESIA_URL}/tts/sse", data=json.dumps(body), headers=headers,
+                             stream=True, timeout=(CARTESIA_TIMEOUT, CARTESIA_TIMEOUT)) as response:
+        if not response.ok:
+            raise ValueError(f"Failed to generate audio. {response.text}")
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:])
+            if "error" in event:
+                raise RuntimeError(f"Error generating audio: {event['error']}")
+            if event.get("done"):
+                break
+            yield base64.b64decode(event["data"])
+
+
+def stream_wav(text, source=None, pcm=None):
+    """
+    Stream the response as 16-bit WAV, converting each SSE chunk as soon as it arrives.
+
+    `source` is an iterable of raw float32 PCM chunks; it defaults to the
+    Cartesia stream and can be any local producer for testing. Converted
+    samples accumulate in `pcm` so callers can keep the full clip.
+    """
+    chunks = audio_chunks(text) if source is None else source
+    pcm = PCMBuffer() if pcm is None else pcm
+    yield wav_header()
+
+    for chunk in chunks:
+        start = pcm.size
+        if pcm.write(chunk):
+            yield pcm.samples(start).tobytes()
+
+
+def speech_stream(text, source=None):
+    """
+    Stream WAV audio for `text`, serving it from the phrase cache when possible.
+    Newly synthesized audio is cached once the stream has been fully sent.
+    """
+    key = phrase_cache.key(text, voice_id, model_id, "wav")
+    cached = phrase_cache.get_bytes(key, "wav")
+    if cached is not None:
+        yield cached
+        return
+
+    pcm = PCMBuffer()
+    yield from stream_wav(text, source, pcm)
+
+    # Cache with a header that carries the real size instead of the open-ended one
+    phrase_cache.put(key, "wav", encode_audio(pcm, "wav"), memory=True)
+
+
+def text_to_speech(text, source=None, audio_format=None):
+    """
+    Synthesize `text` and return its path relative to static/.
+    Cached phrases are returned without calling Cartesia or an encoder.
+    """
+    audio_format = audio_format or AUDIO_FORMAT
+    extension, _ = AUDIO_FORMATS[audio_format]
+    key = phrase_cache.key(text, voice_id, model_id, audio_format)
+    filename = phrase_cache.get(key, extension)
+    if filename is not None:
+        return f"{CACHE_URL_DIR}/{filename}"
+
+    # Convert chunks into 16-bit PCM as they arrive
+    pcm = PCMBuffer()
+    with span("tts", "synthesize"):
+        for chunk in (audio_chunks(text) if source is None else source):
+            pcm.write(chunk)
+
+    with span("tts", f"encode_{audio_format}"):
+        audio = encode_audio(pcm, audio_format)
+    filename = phrase_cache.put(key, extension, audio)
+    return f"{CACHE_URL_DIR}/{filename}"
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+
+class PhraseCache:
+    """
+    Content-addressed cache of synthesized audio.
+
+    Entries are stored as `<sha256>.<ext>` files under `directory`, capped at
+    `max_disk_bytes` with least-recently-used eviction. Clips served as bytes
+    (`get_bytes`, behind /speech/<id>) are also kept in memory, up to
+    `max_memory_bytes`; clips served as files never are, since the web
+    server reads those from disk.
+    """
+
+    def __init__(self, directory, max_disk_bytes=256 * 1024 * 1024, max_memory_bytes=16 * 1024 * 1024):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._lock = threading.Lock()
+        self._disk = OrderedDict()    # filename -> size in bytes, oldest first
+        self._memory = OrderedDict()  # filename -> audio bytes, oldest first
+        self.disk_bytes = 0
+        self.memory_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(text, voice_id, model_id, audio_format):
+        """
+        Hash everything that changes the synthesized audio.
+        """
+        payload = json.dumps([text, voice_id, model_id, audio_format], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def get(self, key, ext):
+        """
+        Return the cached filename for `key`, or None on a miss.
+        """
+        filename = f"{key}.{ext}"
+        with self._lock:
+            if filename in self._disk:
+                self._disk.move_to_end(filename)
+                self.disk_hits += 1
+                return filename
+            self.misses += 1
+            return None
+
+    def get_bytes(self, key, ext):
+        """
+        Return the cached audio for `key`, promoting it to the in-memory tier.
+        """
+        filename = f"{key}.{ext}"
+        with self._lock:
+            data = self._memory.get(filename)
+            if data is not None:
+                self._memory.move_to_end(filename)
+                self._disk.move_to_end(filename)
+                self.memory_hits += 1
+                return data
+        if self.get(key, ext) is None:
+            return None
+        try:
+            with open(self.path(filename), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(filename)
+            return None
+        with self._lock:
+            self._remember(filename, data)
+        return data
+
+    def put(self, key, ext, data, memory=False):
+        """
+        Store `data` under `key` and return its filename. With `memory`, the
+        clip is also kept in memory for the next `get_bytes`.
+        """
+        filename = f"{key}.{ext}"
+        # Write to a temporary name first so readers never see a partial file
+        tmp_path = self.path(f".{filename}.{uuid.uuid4().hex}")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path(filename))
+
+        with self._lock:
+            self._forget(filename)
+            self._disk[filename] = len(data)
+            self.disk_bytes += len(data)
+            if memory:
+                self._remember(filename, data)
+            self._evict_disk()
+        return filename
+
+    def _remember(self, filename, data):
+        if len(data) > self.max_memory_bytes:
+            return
+        if filename in self._memory:
+            self._memory.move_to_end(filename)
+            return
+        self._memory[filename] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _forget(self, filename):
+        size = self._disk.pop(filename, None)
+        if size is not None:
+            self.disk_bytes -= size
+        data = self._memory.pop(filename, None)
+        if data is not None:
+            self.memory_bytes -= len(data)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+            filename = next(iter(self._disk))
+            self._forget(filename)
+            self.evictions += 1
+            try:
+                os.remove(self.path(filename))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._disk),
+                "disk_bytes": self.disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self.memory_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
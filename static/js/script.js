@@ -8,7 +8,8 @@ const canvas = document.getElementById('audio-visualizer');
 const canvasCtx = canvas.getContext('2d');
 let audioContext, analyser, microphone, dataArray, bufferLength, animationFrameId;
 let recognition; // Declare recognition outside to manage it globally
-let lastOrderData = []; // Store last order data for comparison
+let orderCursor = 0; // Id of the last order shown in the summary table
+const ORDER_POLL_MS = 5000; // Summary refresh interval when live updates are unavailable
 
 // Handle menu upload
 menuForm.addEventListener('submit', (event) => {
@@ -27,16 +28,38 @@ menuForm.addEventListener('submit', (event) => {
         }
         return response.json();
     })
-    .then(data => {
-        // Display success message
-        voiceOutput.textContent = data.message; // Show the success message on the page
-    })
+    .then(data => pollMenuUpload(data.status_url))
     .catch(err => {
         console.error(err);
         voiceOutput.textContent = "Error uploading or processing menu. Please try again."; // Show error message on the page
     });
 });
 
+// Follow a menu upload job until it finishes
+function pollMenuUpload(statusUrl) {
+    fetch(statusUrl)
+    .then(response => {
+        if (!response.ok) {
+            throw new Error('Network response was not ok');
+        }
+        return response.json();
+    })
+    .then(job => {
+        if (job.status === 'done') {
+            voiceOutput.textContent = "Menu uploaded successfully!";
+        } else if (job.status === 'failed' || job.status === 'cancelled') {
+            voiceOutput.textContent = "Menu upload " + job.status + ". Please try again.";
+        } else {
+            voiceOutput.textContent = "Processing menu: " + job.stage + " (" + Math.round(job.progress * 100) + "%)";
+            setTimeout(() => pollMenuUpload(statusUrl), 1000);
+        }
+    })
+    .catch(err => {
+        console.error(err);
+        voiceOutput.textContent = "Error uploading or processing menu. Please try again.";
+    });
+}
+
 // Start voice interaction
 voiceBtn.addEventListener('click', () => {
     recognition = new webkitSpeechRecognition();
@@ -52,24 +75,17 @@ voiceBtn.addEventListener('click', () => {
         // Stop the visualizer after the result is returned
         stopAudioVisualizer();
 
-        // Send voice input to server
+        // Send voice input to server; the reply streams back sentence by sentence
         fetch('/voice-interaction', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ user_input: transcript })
+            body: JSON.stringify({ user_input: transcript, pipeline: true })
         })
         .then(response => {
             if (!response.ok) {
                 throw new Error('Network response was not ok');
             }
-            return response.json();
-        })
-        .then(data => {
-            voiceOutput.textContent = data.response;
-            playAudio(data.audio_url); // Play the audio response
-            if (data.response.includes("Order confirmed")) {
-                updateOrderSummary(); // Update summary if order is confirmed
-            }
+            return readReplySegments(response);
         })
         .catch(err => console.error(err));
     };
@@ -120,7 +136,7 @@ document.getElementById('reset-order-btn').addEventListener('click', () => {
     .then(data => {
         const tbody = document.querySelector('#order-summary-table tbody');
         tbody.innerHTML = ''; // Clear all rows
-        lastOrderData = []; // Reset lastOrderData to prevent unnecessary updates
+        orderCursor = data.cursor; // Only orders placed after the reset are shown
         voiceOutput.textContent = data.message; // Feedback message from the server
     })
     .catch(err => console.error('Error resetting order summary:', err));
@@ -128,9 +144,9 @@ document.getElementById('reset-order-btn').addEventListener('click', () => {
 
 
 
-// Function to update the order summary table
+// Function to update the order summary table with orders placed since the last update
 function updateOrderSummary() {
-    fetch('/order-summary', { method: 'GET' })
+    fetch(`/order-summary?since=${orderCursor}`, { method: 'GET' })
     .then(response => {
         if (!response.ok) {
             throw new Error('Network response was not ok');
@@ -138,33 +154,103 @@ function updateOrderSummary() {
         return response.json();
     })
     .then(data => {
-        console.log('Fetched order data:', data); // Log fetched order data
-        if (JSON.stringify(data) !== JSON.stringify(lastOrderData)) {
-            lastOrderData = data;
-            const tbody = document.querySelector('#order-summary-table tbody');
-            tbody.innerHTML = '';
-
-            data.forEach(order => {
-                const row = document.createElement('tr');
-                row.innerHTML = `
-                    <td>${order.customer_name}</td>
-                    <td>${order.items}</td>
-                    <td>${order.customizations}</td>
-                    <td>${order.price_per_item}</td>
-                    <td>${order.order_total}</td>
-                `;
-                tbody.appendChild(row);
-            });
+        appendOrderRows(data.orders);
+        orderCursor = Math.max(orderCursor, data.cursor);
+        if (data.has_more) {
+            updateOrderSummary(); // Fetch the next page
         }
     })
     .catch(err => console.error('Error updating order summary:', err));
 }
 
+function appendOrderRows(orders) {
+    const tbody = document.querySelector('#order-summary-table tbody');
+    orders.forEach(order => {
+        if (order.id <= orderCursor) {
+            return; // Already shown (pushed and fetched orders can overlap)
+        }
+        orderCursor = order.id;
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td>${order.customer_name}</td>
+            <td>${order.items}</td>
+            <td>${order.customizations}</td>
+            <td>${order.price_per_item}</td>
+            <td>${order.order_total}</td>
+        `;
+        tbody.appendChild(row);
+    });
+}
+
 
-// Function to play audio from URL
-function playAudio(url) {
+// Read an NDJSON reply: each line is a spoken segment in order, then the full response
+async function readReplySegments(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    let spoken = [];
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        for (const line of lines) {
+            if (!line.trim()) {
+                continue;
+            }
+            const data = JSON.parse(line);
+            if (data.error) {
+                voiceOutput.textContent = data.error;
+            } else if (data.done) {
+                voiceOutput.textContent = data.response;
+                if (data.response.includes("Order confirmed")) {
+                    updateOrderSummary(); // Update summary if order is confirmed
+                }
+            } else {
+                spoken.push(data.text);
+                voiceOutput.textContent = spoken.join(' ');
+                enqueueAudio(data.audio_url);
+            }
+        }
+    }
+}
+
+// Segments play back to back; each starts loading as soon as it is queued
+const playlist = [];
+let playlistPlaying = false;
+
+function enqueueAudio(url) {
     const audio = new Audio(url);
-    audio.play().catch(err => console.error('Audio playback error:', err));
+    audio.preload = 'auto';
+    playlist.push(audio);
+    if (!playlistPlaying) {
+        playNextSegment();
+    }
+}
+
+function playNextSegment() {
+    const audio = playlist.shift();
+    if (!audio) {
+        playlistPlaying = false;
+        return;
+    }
+    playlistPlaying = true;
+    let finished = false;
+    const next = () => {
+        if (!finished) {
+            finished = true;
+            playNextSegment();
+        }
+    };
+    audio.onended = next;
+    audio.onerror = next;
+    audio.play().catch(err => {
+        console.error('Audio playback error:', err);
+        next();
+    });
 }
 
 // Function to start visualizing microphone input
@@ -233,5 +319,46 @@ function drawVisualizer() {
     canvasCtx.stroke();
 }
 
-// Periodically check for updates every 5 seconds
-// setInterval(updateOrderSummary, 5000);
+// Live order updates pushed by the server
+function clearOrderRows(cursor) {
+    document.querySelector('#order-summary-table tbody').innerHTML = '';
+    orderCursor = cursor;
+}
+
+if (typeof io !== 'undefined') {
+    const socket = io();
+
+    // (Re)subscribe on every connect so reconnects resync from our cursor
+    socket.on('connect', () => {
+        socket.emit('subscribe_orders', { cursor: orderCursor });
+    });
+
+    socket.on('orders_snapshot', page => {
+        if (page.reset) {
+            clearOrderRows(0);
+        }
+        appendOrderRows(page.orders);
+        orderCursor = Math.max(orderCursor, page.cursor);
+        if (page.has_more) {
+            socket.emit('subscribe_orders', { cursor: orderCursor });
+        }
+    });
+
+    socket.on('order_placed', order => {
+        if (order.id > orderCursor + 1) {
+            // Missed an order; ask for everything after our cursor
+            socket.emit('subscribe_orders', { cursor: orderCursor });
+            return;
+        }
+        appendOrderRows([order]);
+    });
+
+    socket.on('orders_reset', data => {
+        clearOrderRows(data.cursor);
+    });
+} else {
+    // No push channel (the client script could not be loaded); poll instead
+    console.warn('Socket.IO client unavailable; polling for orders');
+    updateOrderSummary();
+    setInterval(updateOrderSummary, ORDER_POLL_MS);
+}